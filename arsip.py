@@ -0,0 +1,233 @@
+import argparse
+import calendar
+import time
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+from config import CONFIG
+from laporan import iter_records
+
+# =============================
+# ARSIP KOLOM (NUMPY) UNTUK ANALITIK HISTORIS
+# =============================
+#
+# String (card_id, nama, jurusan, angkatan) disimpan sebagai kode integer + kamus,
+# waktu tap sebagai uint32 detik, confidence sebagai float16 dan atribut terdeteksi
+# sebagai bitmask (bit i = CONFIG['required_objects'][i]).
+
+def parse_tap_time(record):
+    """Waktu tap (waktu lokal kiosk) dalam detik sejak epoch, tanpa konversi timezone"""
+    text = record.get('waktu_presensi')
+    try:
+        moment = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        moment = datetime.fromisoformat(record['timestamp'])
+    return calendar.timegm(moment.timetuple())
+
+class Vocabulary:
+    """Dictionary encoding string -> kode integer"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        value = '' if value is None else str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+def smallest_uint(count):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if count <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.uint64
+
+def build_archive(records, output):
+    """Stream record ke kolom-kolom ringkas lalu simpan sebagai .npz"""
+    required = CONFIG['required_objects']
+    vocabularies = {name: Vocabulary() for name in ('card_id', 'nama', 'jurusan', 'angkatan')}
+    codes = {name: array('I') for name in vocabularies}
+    tap_time = array('I')
+    success = array('B')
+    attributes = array('B')
+    confidences = array('f')
+
+    for record in records:
+        for name, vocabulary in vocabularies.items():
+            codes[name].append(vocabulary.encode(record.get(name)))
+        tap_time.append(parse_tap_time(record))
+        success.append(record.get('status') == "BERHASIL")
+
+        detected = record.get('atribut_terdeteksi', [])
+        scores = record.get('confidence_scores', {})
+        mask = 0
+        for i, obj in enumerate(required):
+            if obj in detected:
+                mask |= 1 << i
+            confidences.append(scores.get(obj, np.nan))
+        attributes.append(mask)
+
+    columns = {
+        'tap_time': np.frombuffer(tap_time, dtype=np.uint32),
+        'success': np.frombuffer(success, dtype=np.uint8).astype(bool),
+        'attributes': np.frombuffer(attributes, dtype=np.uint8),
+        'confidences': np.frombuffer(confidences, dtype=np.float32).astype(np.float16).reshape(-1, len(required)),
+        'required_objects': np.array(required)
+    }
+    for name, vocabulary in vocabularies.items():
+        columns[name] = np.frombuffer(codes[name], dtype=np.uint32).astype(smallest_uint(len(vocabulary.values)))
+        columns[f"{name}_vocab"] = np.array(vocabulary.values)
+
+    np.savez_compressed(output, **columns)
+    return len(tap_time)
+
+class AttendanceArchive:
+    """Query vectorized di atas arsip kolom"""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.columns = {name: data[name] for name in data.files}
+        self.required = list(self.columns['required_objects'])
+        self.tap_time = self.columns['tap_time'].astype(np.int64)
+
+    def __len__(self):
+        return len(self.tap_time)
+
+    def period_mask(self, start=None, end=None):
+        """Mask record dengan tanggal start <= tanggal <= end (YYYY-MM-DD)"""
+        mask = np.ones(len(self), dtype=bool)
+        if start:
+            mask &= self.tap_time >= calendar.timegm(time.strptime(start, "%Y-%m-%d"))
+        if end:
+            mask &= self.tap_time < calendar.timegm(time.strptime(end, "%Y-%m-%d")) + 86400
+        return mask
+
+    def month_mask(self, month):
+        year, mon = (int(part) for part in month.split('-'))
+        last_day = calendar.monthrange(year, mon)[1]
+        return self.period_mask(f"{month}-01", f"{month}-{last_day:02d}")
+
+    def count_by(self, column, mask):
+        """Jumlah record per nilai kolom (dictionary-encoded) untuk mask tertentu"""
+        vocab = self.columns[f"{column}_vocab"]
+        counts = np.bincount(self.columns[column][mask], minlength=len(vocab))
+        return {str(vocab[i]): int(count) for i, count in enumerate(counts) if count}
+
+    def count_students_by(self, column, mask):
+        """Jumlah card_id unik per nilai kolom untuk mask tertentu"""
+        vocab = self.columns[f"{column}_vocab"]
+        card_count = len(self.columns['card_id_vocab'])
+        pairs = np.unique(self.columns[column][mask].astype(np.int64) * card_count
+                          + self.columns['card_id'][mask])
+        counts = np.bincount(pairs // card_count, minlength=len(vocab))
+        return {str(vocab[i]): int(count) for i, count in enumerate(counts) if count}
+
+    def per_day_mask(self, mask=None, first=False):
+        """Satu record per (card_id, hari): tap terakhir seperti dashboard, atau tap pertama"""
+        mask = np.ones(len(self), dtype=bool) if mask is None else mask
+        index = np.flatnonzero(mask)
+        result = np.zeros(len(self), dtype=bool)
+        if not len(index):
+            return result
+
+        cards = self.columns['card_id'][index]
+        days = self.tap_time[index] // 86400
+        # lexsort stabil - tap dengan detik yang sama tetap urut sesuai file
+        order = np.lexsort((self.tap_time[index], days, cards))
+        cards, days = cards[order], days[order]
+        boundary = (cards[1:] != cards[:-1]) | (days[1:] != days[:-1])
+        keep = np.concatenate(([True], boundary)) if first else np.concatenate((boundary, [True]))
+        result[index[order][keep]] = True
+        return result
+
+    def late_mask(self, jam_masuk=None):
+        """Tap setelah jam masuk (HH:MM)"""
+        hours, minutes = (int(part) for part in (jam_masuk or CONFIG['jam_masuk']).split(':'))
+        return self.tap_time % 86400 > hours * 3600 + minutes * 60
+
+    def late_first_taps(self, month, jam_masuk=None):
+        """Tap pertama per siswa per hari yang lewat jam masuk - tap ulang tidak dihitung"""
+        return self.per_day_mask(self.month_mask(month), first=True) & self.late_mask(jam_masuk)
+
+    def late_per_jurusan(self, month, jam_masuk=None):
+        """Siswa (card_id unik) yang pernah terlambat per jurusan dalam satu bulan"""
+        return self.count_students_by('jurusan', self.late_first_taps(month, jam_masuk))
+
+    def late_days_per_jurusan(self, month, jam_masuk=None):
+        """Jumlah siswa-hari terlambat per jurusan dalam satu bulan"""
+        return self.count_by('jurusan', self.late_first_taps(month, jam_masuk))
+
+    def success_rate_by(self, column, mask=None):
+        """Persentase siswa-hari BERHASIL per jurusan/angkatan (record terakhir per hari)"""
+        mask = self.per_day_mask(mask)
+        vocab = self.columns[f"{column}_vocab"]
+        codes = self.columns[column][mask]
+        totals = np.bincount(codes, minlength=len(vocab))
+        passed = np.bincount(codes, weights=self.columns['success'][mask], minlength=len(vocab))
+        return {str(vocab[i]): round(passed[i] / totals[i] * 100, 1) for i in range(len(vocab)) if totals[i]}
+
+    def missing_attribute_by(self, column, mask=None):
+        """Jumlah siswa-hari tanpa atribut tertentu (record terakhir per hari), per jurusan/angkatan"""
+        mask = self.per_day_mask(mask)
+        result = {}
+        for i, obj in enumerate(self.required):
+            missing = mask & ((self.columns['attributes'] & (1 << i)) == 0)
+            result[obj] = self.count_by(column, missing)
+        return result
+
+    def mean_confidence(self, mask=None):
+        mask = np.ones(len(self), dtype=bool) if mask is None else mask
+        scores = self.columns['confidences'][mask].astype(np.float32)
+        return {obj: float(np.nanmean(scores[:, i])) if np.any(~np.isnan(scores[:, i])) else None
+                for i, obj in enumerate(self.required)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Arsip kolom presensi dan query analitik")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Buat arsip .npz dari presensi.json / log *.jsonl")
+    build_parser.add_argument('inputs', nargs='*', default=["presensi.json"])
+    build_parser.add_argument('--output', default="presensi_arsip.npz")
+
+    query_parser = subparsers.add_parser('query', help="Query arsip")
+    query_parser.add_argument('archive')
+    query_parser.add_argument('--bulan', default=datetime.now().strftime("%Y-%m"))
+    query_parser.add_argument('--jam-masuk', default=CONFIG['jam_masuk'])
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count = build_archive(iter_records(args.inputs), args.output)
+        print(f"✅ {count} record diarsipkan ke {args.output}")
+        return
+
+    start = time.perf_counter()
+    archive = AttendanceArchive(args.archive)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    month = archive.month_mask(args.bulan)
+    late = archive.late_per_jurusan(args.bulan, args.jam_masuk)
+    late_days = archive.late_days_per_jurusan(args.bulan, args.jam_masuk)
+    rate = archive.success_rate_by('jurusan', month)
+    missing = archive.missing_attribute_by('jurusan', month)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📦 {len(archive)} record (load {load_ms:.1f}ms, query {query_ms:.1f}ms)")
+    print(f"\n⏰ Terlambat (> {args.jam_masuk}) per jurusan, {args.bulan}:")
+    for jurusan, count in sorted(late.items()):
+        print(f"   {jurusan or '-':<15} {count} siswa, {late_days[jurusan]} siswa-hari")
+    print(f"\n✅ Persentase atribut lengkap per jurusan, {args.bulan}:")
+    for jurusan, percent in sorted(rate.items()):
+        print(f"   {jurusan or '-':<15} {percent}%")
+    print(f"\n❌ Siswa-hari tanpa atribut per jurusan, {args.bulan}:")
+    for obj, counts in missing.items():
+        print(f"   {obj:<15} {counts}")
+
+if __name__ == "__main__":
+    main()
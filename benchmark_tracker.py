@@ -0,0 +1,107 @@
+import argparse
+import json
+import time
+
+import cv2
+from ultralytics import YOLO
+
+from config import CONFIG
+from deteksi import SimpleDetectionManager, FrameGate, AttributeTracker, DetectionPipeline
+
+# =============================
+# BENCHMARK DETECTOR + TRACKER PADA REKAMAN SESI
+# =============================
+
+def run_session(model, video_path, detect_every, tracker_type, use_gate):
+    """Putar satu rekaman sesi melalui pipeline, return metrik dan hasil deteksi"""
+    config = dict(CONFIG)
+    config['tracker'] = dict(CONFIG['tracker'], detect_every=detect_every)
+    
+    manager = SimpleDetectionManager(CONFIG['required_objects'], CONFIG['min_confidence'])
+    gate = None
+    if use_gate:
+        gate = FrameGate(**{k: v for k, v in CONFIG['motion_gate'].items() if k != 'enabled'})
+    tracker = None
+    if detect_every > 1:
+        tracker = AttributeTracker(tracker_type, CONFIG['tracker']['confidence_decay'])
+    
+    # Controller dimatikan supaya semua mode memakai level yang sama
+    pipeline = DetectionPipeline(model, config, manager, gate, None, tracker)
+    
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    max_frames = int(fps * CONFIG['detection_duration'])
+    
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    while pipeline.frame_index < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        pipeline.process(cv2.resize(frame, (640, 480)))
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.time() - wall_start
+    cap.release()
+    
+    metrics = pipeline.get_metrics()
+    evidence_frames = metrics['frames_inferred'] + metrics['frames_tracked']
+    return {
+        'video': video_path,
+        'detect_every': detect_every,
+        'frames': metrics['frames'],
+        'frames_inferred': metrics['frames_inferred'],
+        'frames_tracked': metrics['frames_tracked'],
+        'cpu_time': round(cpu_time, 3),
+        'wall_time': round(wall_time, 3),
+        'evidence_fps_per_cpu': round(evidence_frames / cpu_time, 2) if cpu_time > 0 else 0.0,
+        'results': manager.get_results()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mode detector + tracker pada rekaman sesi kiosk")
+    parser.add_argument('videos', nargs='+', help="File video rekaman sesi")
+    parser.add_argument('--model', default=CONFIG['model_path'])
+    parser.add_argument('--detect-every', default="1,2,3,5", help="Daftar interval YOLO, pisahkan dengan koma")
+    parser.add_argument('--tracker', default=CONFIG['tracker']['type'])
+    parser.add_argument('--gate', action='store_true', help="Aktifkan motion gate")
+    parser.add_argument('--json', help="Simpan hasil lengkap ke file JSON")
+    args = parser.parse_args()
+    
+    model = YOLO(args.model)
+    # Interval 1 (YOLO setiap frame) selalu ikut sebagai baseline keputusan
+    intervals = sorted({int(n) for n in args.detect_every.split(',')} | {1})
+    if intervals[0] < 1:
+        raise SystemExit("❌ --detect-every harus >= 1")
+    
+    rows = []
+    for video_path in args.videos:
+        video_rows = {detect_every: run_session(model, video_path, detect_every, args.tracker, args.gate)
+                      for detect_every in intervals}
+        baseline = set(video_rows[1]['results']['detected_objects'])
+        for detect_every in intervals:
+            row = video_rows[detect_every]
+            row['same_decision'] = set(row['results']['detected_objects']) == baseline
+            rows.append(row)
+    
+    print(f"{'video':<30} {'N':>3} {'frames':>6} {'yolo':>5} {'track':>5} "
+          f"{'cpu s':>7} {'evid/cpu-s':>10} {'sama':>5}")
+    for row in rows:
+        print(f"{row['video'][-30:]:<30} {row['detect_every']:>3} {row['frames']:>6} "
+              f"{row['frames_inferred']:>5} {row['frames_tracked']:>5} {row['cpu_time']:>7.2f} "
+              f"{row['evidence_fps_per_cpu']:>10.2f} {'ya' if row['same_decision'] else 'TIDAK':>5}")
+    
+    # Ringkasan per interval
+    print("\n📊 Rata-rata per interval:")
+    for detect_every in intervals:
+        subset = [row for row in rows if row['detect_every'] == detect_every]
+        avg_rate = sum(row['evidence_fps_per_cpu'] for row in subset) / len(subset)
+        agreement = sum(row['same_decision'] for row in subset) / len(subset) * 100
+        print(f"   N={detect_every}: {avg_rate:.2f} evidence frame / CPU-detik, keputusan sama {agreement:.0f}%")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=4)
+        print(f"✅ Hasil disimpan ke {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+// coba-worker.js - Pemrosesan data presensi di luar main thread
+//
+// Dijalankan sebagai Web Worker oleh coba.js. Jika browser tidak mendukung Worker,
+// file ini dimuat biasa lewat <script> dan fungsi yang sama dipanggil langsung.
+
+// localStorage umumnya dibatasi ~5MB, data lebih besar tidak di-cache
+const CACHE_MAX_CHARS = 2000000;
+
+const presensiStore = {
+    records: [],        // Semua record, urut timestamp terbaru dulu (tabel riwayat)
+    byDate: new Map(),  // tanggal -> Map(card_id -> record terbaru di tanggal itu)
+    jurusanCount: 0,
+    hash: null
+};
+
+// ================== INDEXING FUNCTIONS ================== //
+
+function parseTimestamp(value) {
+    const time = Date.parse(value);
+    return isNaN(time) ? 0 : time;
+}
+
+// Hash = jumlah data + timestamp terbaru (tanpa Math.max(...spread) yang overflow di data besar)
+function generateDataHash(data) {
+    if (!data || !Array.isArray(data)) return 'empty';
+
+    let latestTimestamp = null;
+    for (const item of data) {
+        if (!item.timestamp) continue;
+        const time = Date.parse(item.timestamp);
+        if (latestTimestamp === null || time > latestTimestamp) {
+            latestTimestamp = time;
+        }
+    }
+
+    if (latestTimestamp === null) return `count-${data.length}`;
+    return `count-${data.length}-time-${latestTimestamp}`;
+}
+
+function indexAttendanceData(data) {
+    // Timestamp di-parse sekali per record, bukan di setiap perbandingan sort
+    const keyed = data.map(record => ({ record, time: parseTimestamp(record.timestamp) }));
+    keyed.sort((a, b) => b.time - a.time);
+
+    const byDate = new Map();
+    const jurusanSet = new Set();
+
+    for (const { record } of keyed) {
+        jurusanSet.add(record.jurusan);
+
+        let cards = byDate.get(record.tanggal);
+        if (!cards) {
+            cards = new Map();
+            byDate.set(record.tanggal, cards);
+        }
+        // Sudah urut terbaru dulu, jadi record pertama per card_id adalah yang terbaru
+        if (!cards.has(record.card_id)) {
+            cards.set(record.card_id, record);
+        }
+    }
+
+    presensiStore.records = keyed.map(item => item.record);
+    presensiStore.byDate = byDate;
+    presensiStore.jurusanCount = jurusanSet.size;
+}
+
+function loadAttendanceText(text) {
+    const data = JSON.parse(text);
+
+    if (!Array.isArray(data)) {
+        throw new Error('Invalid data format');
+    }
+
+    const hash = generateDataHash(data);
+    if (hash === presensiStore.hash) {
+        return { changed: false, count: data.length, added: 0, hash: hash, cacheText: null };
+    }
+
+    const previousCount = presensiStore.records.length;
+    indexAttendanceData(data);
+    presensiStore.hash = hash;
+
+    return {
+        changed: true,
+        count: data.length,
+        added: data.length - previousCount,
+        hash: hash,
+        cacheText: text.length <= CACHE_MAX_CHARS ? text : null
+    };
+}
+
+async function fetchAttendanceData(url) {
+    const response = await fetch(url);
+
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+
+    return loadAttendanceText(await response.text());
+}
+
+// ================== QUERY FUNCTIONS ================== //
+
+// Record terbaru per card_id untuk satu tanggal, dengan filter jurusan dan angkatan
+function filterDataByJurusanAndDate(jurusan, angkatan, tanggal) {
+    const filteredData = {};
+    const targetDate = tanggal || new Date().toISOString().split('T')[0];
+    const cards = presensiStore.byDate.get(targetDate);
+
+    if (!cards) return filteredData;
+
+    for (const absen of cards.values()) {
+        const jurusanMatch = jurusan === 'all' || absen.jurusan === jurusan;
+
+        let angkatanMatch = angkatan === 'all';
+        if (angkatan !== 'all') {
+            const actualAngkatan = absen.angkatan ? absen.angkatan.toString() : null;
+            angkatanMatch = actualAngkatan === angkatan.toString();
+        }
+
+        if (jurusanMatch && angkatanMatch) {
+            const detected = absen.atribut_terdeteksi || [];
+            filteredData[absen.card_id] = {
+                nama: absen.nama,
+                jurusan: absen.jurusan,
+                angkatan: absen.angkatan || "-",
+                time: absen.waktu_presensi,
+                attributes: {
+                    'nama tag': detected.includes('NAME TAG'),
+                    'pin cita cita': detected.includes('PIN CITA CITA'),
+                    'idCard': detected.includes('ID CARD')
+                },
+                status: absen.status,
+                atribut_terdeteksi: detected,
+                confidence_scores: absen.confidence_scores
+            };
+        }
+    }
+
+    return filteredData;
+}
+
+function handleDataRequest(type, payload = {}) {
+    switch (type) {
+        case 'load':
+            return fetchAttendanceData(payload.url);
+        case 'loadText':
+            return loadAttendanceText(payload.text);
+        case 'filter':
+            return filterDataByJurusanAndDate(payload.jurusan, payload.angkatan, payload.tanggal);
+        case 'historyInfo':
+            return { count: presensiStore.records.length, jurusanCount: presensiStore.jurusanCount };
+        case 'historyRows':
+            // Hanya potongan yang terlihat yang dikirim ke main thread
+            return presensiStore.records.slice(payload.start, payload.end);
+        default:
+            throw new Error(`Unknown request: ${type}`);
+    }
+}
+
+// ================== WORKER ENTRY ================== //
+
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    self.onmessage = async (event) => {
+        const { id, type, payload } = event.data;
+        try {
+            const result = await handleDataRequest(type, payload);
+            self.postMessage({ id: id, result: result });
+        } catch (error) {
+            self.postMessage({ id: id, error: error.message });
+        }
+    };
+}
@@ -17,10 +17,22 @@ let currentRecapFilter = {
 
 // Variabel untuk smart detection
 let lastDataHash = null;
-let dataCache = null;
+let dataCount = null; // Jumlah record yang sudah dimuat di worker (null = belum ada data)
 let refreshInterval = null;
 let isFirstLoad = true;
 
+// Variabel untuk data worker (filter/sort/index di luar main thread)
+let dataWorker = null;
+let workerRequestId = 0;
+const pendingWorkerRequests = new Map();
+
+// Variabel untuk tabel riwayat virtual (hanya baris yang terlihat yang dirender)
+const HISTORY_PAGE_SIZE = 200;
+const HISTORY_MAX_PAGES = 20;
+const HISTORY_OVERSCAN = 15;
+const HISTORY_ROW_HEIGHT = 80;
+let historyView = null;
+
 // Data jurusan yang tersedia
 const availableJurusan = ['Mekatronika', 'Pemesinan', 'Ototronik', 'Animasi'];
 
@@ -54,6 +66,9 @@ function initializeApp() {
     // Load forum posts
     loadForumPosts();
     
+    // Worker untuk pemrosesan data presensi
+    initDataWorker();
+
     // ⭐ PERBAIKAN: Smart auto-refresh dengan delay lebih panjang
     setTimeout(() => {
         // Load data pertama kali
@@ -107,56 +122,106 @@ function setupEventListeners() {
     document.addEventListener('visibilitychange', handleVisibilityChange);
 }
 
-// ================== SMART DATA LOADING FUNCTIONS ================== //
+// ================== DATA WORKER FUNCTIONS ================== //
 
-// ⭐ FUNGSI BARU: Smart data checking - hanya refresh jika ada data baru
-async function checkForNewData() {
+// ⭐ FUNGSI BARU: Parsing, sort dan index data dilakukan di Web Worker
+function initDataWorker() {
+    if (!window.Worker) {
+        console.log('⚠️ Web Worker tidak didukung, data diproses di main thread');
+        return;
+    }
+    
     try {
-        console.log('🔍 Checking for new data...');
-        
-        const response = await fetch(`presensi.json?t=${Date.now()}`);
+        dataWorker = new Worker('coba-worker.js');
+    } catch (error) {
+        console.log('⚠️ Gagal membuat worker, data diproses di main thread:', error.message);
+        dataWorker = null;
+        return;
+    }
+    
+    dataWorker.onmessage = (event) => {
+        const { id, result, error } = event.data;
+        const request = pendingWorkerRequests.get(id);
+        if (!request) return;
         
-        if (!response.ok) {
-            console.log('❌ Fetch failed, skipping update');
-            return;
+        pendingWorkerRequests.delete(id);
+        if (error) {
+            request.reject(new Error(error));
+        } else {
+            request.resolve(result);
         }
+    };
+    
+    dataWorker.onerror = (event) => {
+        console.error('❌ Worker error, beralih ke main thread:', event.message);
+        dataWorker.terminate();
+        dataWorker = null;
         
-        const newData = await response.json();
-        
-        if (!Array.isArray(newData)) {
-            console.log('❌ Invalid data format, skipping update');
-            return;
+        for (const request of pendingWorkerRequests.values()) {
+            request.reject(new Error('Worker error'));
         }
+        pendingWorkerRequests.clear();
+    };
+}
+
+// Kirim request ke worker (atau jalankan langsung jika worker tidak tersedia)
+function requestData(type, payload = {}) {
+    if (!dataWorker) {
+        return Promise.resolve().then(() => handleDataRequest(type, payload));
+    }
+    
+    return new Promise((resolve, reject) => {
+        const id = ++workerRequestId;
+        pendingWorkerRequests.set(id, { resolve, reject });
+        dataWorker.postMessage({ id: id, type: type, payload: payload });
+    });
+}
+
+// Simpan data mentah ke localStorage jika ukurannya muat
+function cacheAttendanceData(text) {
+    if (!text) {
+        console.log('⚠️ Data terlalu besar untuk cache localStorage');
+        return;
+    }
+    
+    try {
+        localStorage.setItem('attendanceData', text);
+    } catch (error) {
+        console.log('⚠️ Gagal menyimpan cache:', error.message);
+    }
+}
+
+// ================== SMART DATA LOADING FUNCTIONS ================== //
+
+// ⭐ FUNGSI BARU: Smart data checking - hanya refresh jika ada data baru
+async function checkForNewData() {
+    try {
+        console.log('🔍 Checking for new data...');
         
-        // Generate hash untuk data baru
-        const newHash = generateDataHash(newData);
+        // Fetch, parse dan hash dilakukan di worker
+        const result = await requestData('load', { url: `presensi.json?t=${Date.now()}` });
         
         // Bandingkan dengan hash sebelumnya
-        if (newHash === lastDataHash) {
+        if (!result.changed) {
             console.log('✅ No new data detected');
             return; // Tidak ada data baru, keluar
         }
         
         console.log('🔄 New data detected! Updating...');
         
-        // Update cache dan hash
-        dataCache = newData;
-        lastDataHash = newHash;
+        // Update jumlah data dan hash
+        dataCount = result.count;
+        lastDataHash = result.hash;
         
         // Simpan ke localStorage
-        localStorage.setItem('attendanceData', JSON.stringify(newData));
-        
-        // Hitung berapa data baru
-        const oldCount = dataCache ? dataCache.length : 0;
-        const newCount = newData.length;
-        const newRecords = newCount - oldCount;
+        cacheAttendanceData(result.cacheText);
         
         // Process dan tampilkan data
-        processAndDisplayData(newData);
+        await processAndDisplayData();
         
         // Tampilkan notifikasi jika ada data baru
-        if (newRecords > 0) {
-            showMessage(`📊 ${newRecords} data baru ditemukan!`, 'success');
+        if (result.added > 0) {
+            showMessage(`📊 ${result.added} data baru ditemukan!`, 'success');
         }
         
         updateLastUpdate();
@@ -186,22 +251,21 @@ function handleVisibilityChange() {
 }
 
 // ⭐ FUNGSI BARU: Process dan display data dengan aman
-function processAndDisplayData(data) {
-    if (!data || !Array.isArray(data)) {
+async function processAndDisplayData() {
+    if (dataCount === null) {
         console.error('❌ No valid data to process');
         showEmptyState();
         return;
     }
     
-    console.log('🖥️ Processing data for display:', data.length, 'records');
+    console.log('🖥️ Processing data for display:', dataCount, 'records');
     
-    // Terapkan filter yang aktif
-    const filteredData = filterDataByJurusanAndDate(
-        data, 
-        currentFilter.jurusan, 
-        currentFilter.angkatan,
-        currentFilter.tanggal
-    );
+    // Terapkan filter yang aktif (di worker, memakai index per tanggal)
+    const filteredData = await requestData('filter', {
+        jurusan: currentFilter.jurusan,
+        angkatan: currentFilter.angkatan,
+        tanggal: currentFilter.tanggal
+    });
     
     console.log('🎯 Filtered data:', Object.keys(filteredData).length, 'records');
     
@@ -218,29 +282,21 @@ async function loadAttendanceData(forceRefresh = false) {
             showLoading();
         }
         
-        const response = await fetch(`presensi.json?t=${Date.now()}`);
-        
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}`);
-        }
-        
-        const data = await response.json();
-        
-        if (!Array.isArray(data)) {
-            throw new Error('Invalid data format');
-        }
+        const result = await requestData('load', { url: `presensi.json?t=${Date.now()}` });
         
-        console.log('✅ Data loaded successfully:', data.length, 'records');
+        console.log('✅ Data loaded successfully:', result.count, 'records');
         
-        // Update cache dan hash
-        dataCache = data;
-        lastDataHash = generateDataHash(data);
+        // Update jumlah data dan hash
+        dataCount = result.count;
+        lastDataHash = result.hash;
         
         // Simpan ke localStorage
-        localStorage.setItem('attendanceData', JSON.stringify(data));
+        if (result.changed) {
+            cacheAttendanceData(result.cacheText);
+        }
         
         // Process dan tampilkan data
-        processAndDisplayData(data);
+        await processAndDisplayData();
         
         updateLastUpdate();
         
@@ -251,21 +307,23 @@ async function loadAttendanceData(forceRefresh = false) {
         
     } catch (error) {
         console.error('❌ Error loading data:', error);
-        handleDataLoadError(error);
+        await handleDataLoadError(error);
     } finally {
         hideLoading();
     }
 }
 
 // ⭐ FUNGSI BARU: Handle error loading data
-function handleDataLoadError(error) {
+async function handleDataLoadError(error) {
     // Coba gunakan cache yang ada
     const cachedData = localStorage.getItem('attendanceData');
     if (cachedData) {
         try {
-            const data = JSON.parse(cachedData);
+            const result = await requestData('loadText', { text: cachedData });
             console.log('🔄 Using cached data due to error');
-            processAndDisplayData(data);
+            dataCount = result.count;
+            lastDataHash = result.hash;
+            await processAndDisplayData();
             
             if (!isFirstLoad) {
                 showMessage('⚠ Menggunakan data cache - ' + error.message, 'warning');
@@ -286,6 +344,8 @@ function showEmptyState() {
     const totalSpan = document.getElementById('total');
     const todaySpan = document.getElementById('today');
     
+    stopHistoryView();
+    
     if (tableBody) {
         tableBody.innerHTML = `
             <tr>
@@ -305,18 +365,6 @@ function showEmptyState() {
     if (todaySpan) todaySpan.textContent = '0';
 }
 
-// Fungsi untuk generate hash data
-function generateDataHash(data) {
-    if (!data || !Array.isArray(data)) return 'empty';
-    
-    // Gunakan kombinasi jumlah data dan timestamp terbaru
-    const timestamps = data.map(item => item.timestamp).filter(Boolean);
-    if (timestamps.length === 0) return `count-${data.length}`;
-    
-    const latestTimestamp = Math.max(...timestamps.map(ts => new Date(ts).getTime()));
-    return `count-${data.length}-time-${latestTimestamp}`;
-}
-
 // ================== INITIALIZATION FUNCTIONS ================== //
 
 function populateJurusanDropdowns() {
@@ -666,8 +714,8 @@ function applyFilters() {
     updateFilterInfo();
     
     // ⭐ PERBAIKAN: Gunakan data cache yang sudah ada
-    if (dataCache) {
-        processAndDisplayData(dataCache);
+    if (dataCount !== null) {
+        processAndDisplayData();
     } else {
         loadAttendanceData(false);
     }
@@ -707,8 +755,8 @@ function resetFilters() {
     updateFilterInfo();
     
     // ⭐ PERBAIKAN: Gunakan data cache yang sudah ada
-    if (dataCache) {
-        processAndDisplayData(dataCache);
+    if (dataCount !== null) {
+        processAndDisplayData();
     } else {
         loadAttendanceData(false);
     }
@@ -778,76 +826,6 @@ function updateRecapFilterInfo() {
     filterInfo.textContent = infoText;
 }
 
-// ================== DATA PROCESSING FUNCTIONS ================== //
-
-function filterDataByJurusanAndDate(data, jurusan, angkatan, tanggal) {
-    if (!data || !Array.isArray(data)) return {};
-    
-    const filteredData = {};
-    const targetDate = tanggal || new Date().toISOString().split('T')[0];
-    
-    console.log('🔍 Filtering data for date:', targetDate);
-    console.log('📊 Total data records:', data.length);
-    
-    // Kelompokkan data berdasarkan card_id dan ambil data TERBARU untuk tanggal yang dipilih
-    const latestData = {};
-    
-    // Urutkan data berdasarkan timestamp terbaru
-    const sortedData = [...data].sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
-    
-    console.log('📅 Data dengan tanggal yang sesuai:');
-    
-    sortedData.forEach(absen => {
-        if (absen.tanggal === targetDate) {
-            const cardId = absen.card_id;
-            
-            console.log(`   ✅ ${absen.nama} - ${absen.tanggal} ${absen.waktu_presensi} - ${absen.status}`);
-            
-            // Ambil data terbaru untuk setiap card_id pada tanggal yang dipilih
-            if (!latestData[cardId] || new Date(absen.timestamp) > new Date(latestData[cardId].timestamp)) {
-                latestData[cardId] = absen;
-            }
-        }
-    });
-    
-    console.log('✅ Latest data untuk tanggal', targetDate + ':', Object.keys(latestData).length, 'records');
-    
-    // Sekarang filter berdasarkan jurusan dan angkatan
-    Object.values(latestData).forEach(absen => {
-        // Filter jurusan
-        const jurusanMatch = jurusan === 'all' || absen.jurusan === jurusan;
-        
-        // Filter angkatan
-        let angkatanMatch = angkatan === 'all';
-        if (angkatan !== 'all') {
-            const targetAngkatan = angkatan.toString();
-            const actualAngkatan = absen.angkatan ? absen.angkatan.toString() : null;
-            angkatanMatch = actualAngkatan === targetAngkatan;
-        }
-        
-        if (jurusanMatch && angkatanMatch) {
-            // Convert ke format yang diharapkan
-            filteredData[absen.card_id] = {
-                nama: absen.nama,
-                jurusan: absen.jurusan,
-                angkatan: absen.angkatan || "-",
-                time: absen.waktu_presensi,
-                attributes: {
-                    'nama tag': absen.atribut_terdeteksi.includes('NAME TAG'),
-                    'pin cita cita': absen.atribut_terdeteksi.includes('PIN CITA CITA'),
-                    'idCard': absen.atribut_terdeteksi.includes('ID CARD')
-                },
-                status: absen.status,
-                atribut_terdeteksi: absen.atribut_terdeteksi,
-                confidence_scores: absen.confidence_scores
-            };
-        }
-    });
-    
-    console.log('🎯 Final filtered result:', Object.keys(filteredData).length, 'records');
-    return filteredData;
-}
-
 // ================== DISPLAY FUNCTIONS ================== //
 
 function displayData(data) {
@@ -864,6 +842,8 @@ function displayData(data) {
         return;
     }
     
+    stopHistoryView();
+    
     // Validasi data
     if (!data || typeof data !== 'object' || Object.keys(data).length === 0) {
         console.log('📭 No data to display, showing empty state');
@@ -978,34 +958,37 @@ function displayData(data) {
 
 // ================== HISTORY/RECAP FUNCTIONS ================== //
 
-function showAllHistoryData() {
-    const storedData = localStorage.getItem('attendanceData');
-    if (!storedData) {
+async function showAllHistoryData() {
+    if (dataCount === null) {
         showMessage('❌ Tidak ada data yang tersimpan', 'warning');
         return;
     }
     
-    const data = JSON.parse(storedData);
-    console.log('📚 Menampilkan semua data riwayat:', data.length, 'records');
+    const info = await requestData('historyInfo');
+    console.log('📚 Menampilkan semua data riwayat:', info.count, 'records');
     
     // Update filter info untuk menunjukkan semua data
     const filterInfo = document.getElementById('filterInfo');
     if (filterInfo) {
-        filterInfo.textContent = 'Menampilkan: Semua Data Riwayat (' + data.length + ' records)';
+        filterInfo.textContent = 'Menampilkan: Semua Data Riwayat (' + info.count + ' records)';
     }
     
     // Tampilkan dalam format tabel khusus riwayat
-    displayHistoryData(data);
+    displayHistoryData(info);
 }
 
-function displayHistoryData(data) {
+// ⭐ FUNGSI BARU: Tabel riwayat virtual - hanya baris di sekitar viewport yang ada di DOM,
+// baris diambil dari worker per halaman (HISTORY_PAGE_SIZE) saat dibutuhkan
+function displayHistoryData(info) {
     const tableBody = document.getElementById('tableBody');
     const totalSpan = document.getElementById('total');
     const todaySpan = document.getElementById('today');
     const jurusanCountSpan = document.getElementById('jurusanCount');
     const jurusanLabelSpan = document.getElementById('jurusanLabel');
     
-    if (!data || data.length === 0) {
+    stopHistoryView();
+    
+    if (!info || info.count === 0) {
         tableBody.innerHTML = `
             <tr>
                 <td colspan="9" class="empty-state">
@@ -1021,96 +1004,202 @@ function displayHistoryData(data) {
         if (jurusanLabelSpan) jurusanLabelSpan.textContent = 'Jurusan';
         return;
     }
+    
+    historyView = {
+        total: info.count,
+        rowHeight: HISTORY_ROW_HEIGHT,
+        measured: false,
+        start: -1,
+        end: -1,
+        pages: new Map(),
+        pendingPages: new Set(),
+        frame: null
+    };
+    
+    tableBody.innerHTML = `
+        <tr>
+            <td colspan="9" style="text-align: center; padding: 20px;">⏳ Memuat data riwayat...</td>
+        </tr>
+    `;
+    
+    window.addEventListener('scroll', scheduleHistoryRender, { passive: true });
+    window.addEventListener('resize', scheduleHistoryRender);
+    renderHistoryWindow();
+    
+    totalSpan.textContent = info.count;
+    todaySpan.textContent = info.count;
+    if (jurusanCountSpan) jurusanCountSpan.textContent = info.jurusanCount;
+    if (jurusanLabelSpan) jurusanLabelSpan.textContent = 'Jurusan';
+}
 
-    let html = '';
-    let counter = 1;
-    let totalCount = data.length;
-    let jurusanCount = 0;
-    const jurusanSet = new Set();
+function stopHistoryView() {
+    if (!historyView) return;
     
-    // Urutkan data berdasarkan timestamp terbaru
-    const sortedData = [...data].sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
+    if (historyView.frame) {
+        cancelAnimationFrame(historyView.frame);
+    }
+    window.removeEventListener('scroll', scheduleHistoryRender);
+    window.removeEventListener('resize', scheduleHistoryRender);
+    historyView = null;
+}
+
+function scheduleHistoryRender() {
+    if (!historyView || historyView.frame) return;
     
-    for (const record of sortedData) {
-        jurusanSet.add(record.jurusan);
-        
-        // Analisis atribut
-        const attributeStatus = checkAttributeCompleteness({
-            'nama tag': record.atribut_terdeteksi.includes('NAME TAG'),
-            'pin cita cita': record.atribut_terdeteksi.includes('PIN CITA CITA'),
-            'idCard': record.atribut_terdeteksi.includes('ID CARD')
-        });
-        
-        const missingAttributes = getMissingAttributes({
-            'nama tag': record.atribut_terdeteksi.includes('NAME TAG'),
-            'pin cita cita': record.atribut_terdeteksi.includes('PIN CITA CITA'),
-            'idCard': record.atribut_terdeteksi.includes('ID CARD')
-        });
-        
-        // Status presensi
-        const isSuccess = record.status === "BERHASIL";
-        const statusBadge = isSuccess ? 
-            '<span class="badge badge-success">BERHASIL</span>' : 
-            '<span class="badge badge-danger">GAGAL</span>';
-        
-        // Status atribut
-        let attributeBadge = '';
-        let attributeDetails = '';
-        
-        if (isSuccess) {
-            attributeBadge = attributeStatus.complete ? 
-                '<span class="badge badge-success">Lengkap</span>' : 
-                '<span class="badge badge-warning">Tidak Lengkap</span>';
-        } else {
-            attributeBadge = '<span class="badge badge-danger">Atribut Kurang</span>';
-            attributeDetails = `<br><small style="color: var(--danger);">❌ ${missingAttributes}</small>`;
+    historyView.frame = requestAnimationFrame(() => {
+        if (!historyView) return;
+        historyView.frame = null;
+        renderHistoryWindow();
+    });
+}
+
+async function loadHistoryPage(view, page) {
+    view.pendingPages.add(page);
+    try {
+        const start = page * HISTORY_PAGE_SIZE;
+        const rows = await requestData('historyRows', { start: start, end: start + HISTORY_PAGE_SIZE });
+        view.pages.set(page, rows);
+    } catch (error) {
+        console.error('❌ Error loading history rows:', error);
+    } finally {
+        view.pendingPages.delete(page);
+    }
+    
+    // Abaikan hasil jika tabel riwayat sudah diganti tampilan lain
+    if (view === historyView) {
+        view.start = -1;
+        scheduleHistoryRender();
+    }
+}
+
+function renderHistoryWindow() {
+    const view = historyView;
+    const tableBody = document.getElementById('tableBody');
+    if (!view || !tableBody) return;
+    
+    // Posisi viewport relatif terhadap awal tbody
+    const viewTop = Math.max(0, -tableBody.getBoundingClientRect().top);
+    const first = Math.floor(viewTop / view.rowHeight);
+    const visibleCount = Math.ceil(window.innerHeight / view.rowHeight);
+    // Start selalu genap supaya warna baris selang-seling tidak berkedip saat scroll
+    let start = Math.max(0, Math.min(first, view.total - 1) - HISTORY_OVERSCAN);
+    start -= start % 2;
+    const end = Math.min(view.total, first + visibleCount + HISTORY_OVERSCAN);
+    
+    if (start === view.start && end === view.end) return;
+    
+    // Pastikan semua halaman untuk jendela ini sudah ada di main thread
+    const firstPage = Math.floor(start / HISTORY_PAGE_SIZE);
+    const lastPage = Math.floor((end - 1) / HISTORY_PAGE_SIZE);
+    let missing = false;
+    for (let page = firstPage; page <= lastPage; page++) {
+        if (!view.pages.has(page)) {
+            missing = true;
+            if (!view.pendingPages.has(page)) {
+                loadHistoryPage(view, page);
+            }
         }
-        
-        // Status waktu
-        let timeBadge = '';
-        const absenTime = new Date(record.waktu_presensi);
-        const targetTime = new Date(absenTime);
-        targetTime.setHours(6, 45, 0, 0);
-        const isOnTime = absenTime <= targetTime;
-        
-        if (isSuccess) {
-            timeBadge = isOnTime ? 
-                '<span class="badge badge-success">Tepat Waktu</span>' : 
-                '<span class="badge badge-warning">Terlambat</span>';
-        } else {
-            timeBadge = '<span class="badge badge-secondary">-</span>';
+    }
+    if (missing) return;
+    
+    // Batasi cache halaman, buang yang paling lama dimuat dan tidak sedang terlihat
+    for (const page of view.pages.keys()) {
+        if (view.pages.size <= HISTORY_MAX_PAGES) break;
+        if (page < firstPage || page > lastPage) {
+            view.pages.delete(page);
         }
-        
-        html += `
-            <tr>
-                <td>${counter}</td>
-                <td><strong>${record.card_id}</strong></td>
-                <td>
-                    ${record.nama}
-                    ${attributeDetails}
-                </td>
-                <td>${record.jurusan}</td>
-                <td>${record.angkatan || "-"}</td>
-                <td>${formatDate(record.tanggal)}</td>
-                <td>${formatDateTime(record.waktu_presensi)}</td>
-                <td>${statusBadge}</td>
-                <td>
-                    ${timeBadge}
-                    <br>
-                    ${attributeBadge}
-                </td>
-            </tr>
-        `;
-        counter++;
     }
     
-    jurusanCount = jurusanSet.size;
+    let html = `<tr class="virtual-spacer"><td colspan="9" style="height: ${start * view.rowHeight}px;"></td></tr>`;
+    for (let index = start; index < end; index++) {
+        const rows = view.pages.get(Math.floor(index / HISTORY_PAGE_SIZE));
+        html += renderHistoryRow(rows[index % HISTORY_PAGE_SIZE], index + 1);
+    }
+    html += `<tr class="virtual-spacer"><td colspan="9" style="height: ${(view.total - end) * view.rowHeight}px;"></td></tr>`;
     
     tableBody.innerHTML = html;
-    totalSpan.textContent = totalCount;
-    todaySpan.textContent = totalCount;
-    if (jurusanCountSpan) jurusanCountSpan.textContent = jurusanCount;
-    if (jurusanLabelSpan) jurusanLabelSpan.textContent = 'Jurusan';
+    view.start = start;
+    view.end = end;
+    
+    // Tinggi baris sebenarnya tergantung CSS, ukur sekali lalu render ulang
+    if (!view.measured) {
+        view.measured = true;
+        const rowsHeight = tableBody.offsetHeight - tableBody.rows[0].offsetHeight
+            - tableBody.rows[tableBody.rows.length - 1].offsetHeight;
+        if (rowsHeight > 0) {
+            view.rowHeight = rowsHeight / (end - start);
+            view.start = -1;
+            scheduleHistoryRender();
+        }
+    }
+}
+
+function renderHistoryRow(record, counter) {
+    const detected = record.atribut_terdeteksi || [];
+    const attributes = {
+        'nama tag': detected.includes('NAME TAG'),
+        'pin cita cita': detected.includes('PIN CITA CITA'),
+        'idCard': detected.includes('ID CARD')
+    };
+    
+    // Analisis atribut
+    const attributeStatus = checkAttributeCompleteness(attributes);
+    const missingAttributes = getMissingAttributes(attributes);
+    
+    // Status presensi
+    const isSuccess = record.status === "BERHASIL";
+    const statusBadge = isSuccess ? 
+        '<span class="badge badge-success">BERHASIL</span>' : 
+        '<span class="badge badge-danger">GAGAL</span>';
+    
+    // Status atribut
+    let attributeBadge = '';
+    let attributeDetails = '';
+    
+    if (isSuccess) {
+        attributeBadge = attributeStatus.complete ? 
+            '<span class="badge badge-success">Lengkap</span>' : 
+            '<span class="badge badge-warning">Tidak Lengkap</span>';
+    } else {
+        attributeBadge = '<span class="badge badge-danger">Atribut Kurang</span>';
+        attributeDetails = `<br><small style="color: var(--danger);">❌ ${missingAttributes}</small>`;
+    }
+    
+    // Status waktu
+    let timeBadge = '';
+    const absenTime = new Date(record.waktu_presensi);
+    const targetTime = new Date(absenTime);
+    targetTime.setHours(6, 45, 0, 0);
+    const isOnTime = absenTime <= targetTime;
+    
+    if (isSuccess) {
+        timeBadge = isOnTime ? 
+            '<span class="badge badge-success">Tepat Waktu</span>' : 
+            '<span class="badge badge-warning">Terlambat</span>';
+    } else {
+        timeBadge = '<span class="badge badge-secondary">-</span>';
+    }
+    
+    return `
+        <tr>
+            <td>${counter}</td>
+            <td><strong>${record.card_id}</strong></td>
+            <td>
+                ${record.nama}
+                ${attributeDetails}
+            </td>
+            <td>${record.jurusan}</td>
+            <td>${record.angkatan || "-"}</td>
+            <td>${formatDate(record.tanggal)}</td>
+            <td>${formatDateTime(record.waktu_presensi)}</td>
+            <td>${statusBadge}</td>
+            <td>
+                ${timeBadge}
+                <br>
+                ${attributeBadge}
+            </td>
+        </tr>
+    `;
 }
 
 // ================== ENHANCED FILTER FUNCTIONS ================== //
@@ -1141,8 +1230,8 @@ function showTodayData() {
     document.getElementById('filterTanggal').value = today;
     
     // Load data dengan filter hari ini
-    if (dataCache) {
-        processAndDisplayData(dataCache);
+    if (dataCount !== null) {
+        processAndDisplayData();
     } else {
         loadAttendanceData();
     }
@@ -1186,15 +1275,7 @@ function getMissingAttributes(attributes) {
 
 // ================== RECAP FUNCTIONS ================== //
 
-function calculateAndDisplayRecap(data) {
-    // Filter data untuk rekap berdasarkan filter yang aktif
-    const filteredData = filterDataByJurusanAndDate(
-        data, 
-        currentRecapFilter.jurusan, 
-        currentRecapFilter.angkatan,
-        currentRecapFilter.tanggal
-    );
-    
+function calculateAndDisplayRecap(filteredData) {
     updateRecapStats(filteredData);
     updateRecapTable(filteredData);
     
@@ -1217,12 +1298,16 @@ function calculateAndDisplayRecap(data) {
     }
 }
 
-function calculateAndDisplayRecapFromStorage() {
-    const storedData = localStorage.getItem('attendanceData');
-    if (storedData) {
-        const data = JSON.parse(storedData);
-        calculateAndDisplayRecap(data);
-    }
+async function calculateAndDisplayRecapFromStorage() {
+    if (dataCount === null) return;
+    
+    // Filter data untuk rekap berdasarkan filter yang aktif (di worker)
+    const filteredData = await requestData('filter', {
+        jurusan: currentRecapFilter.jurusan,
+        angkatan: currentRecapFilter.angkatan,
+        tanggal: currentRecapFilter.tanggal
+    });
+    calculateAndDisplayRecap(filteredData);
 }
 
 function calculateJurusanStats(data) {
@@ -1612,7 +1697,8 @@ function printTable() {
 function debugAppState() {
     console.log('🔍 DEBUG APP STATE:');
     console.log('Current Filter:', currentFilter);
-    console.log('Data Cache:', dataCache ? dataCache.length + ' records' : 'No cache');
+    console.log('Data Count:', dataCount !== null ? dataCount + ' records' : 'No data');
+    console.log('Data Worker:', dataWorker ? 'Active' : 'Main thread');
     console.log('Last Data Hash:', lastDataHash);
     console.log('Is First Load:', isFirstLoad);
     console.log('Refresh Interval:', refreshInterval ? 'Active' : 'Inactive');
@@ -0,0 +1,114 @@
+# =============================
+# KONFIGURASI SISTEM
+# =============================
+CONFIG = {
+    'model_path': "runs/detect/train/weights/best.pt",
+    'quantized_model_path': "runs/detect/train/weights/best_int8_openvino_model/",
+    'quantization_report': "runs/detect/train/weights/quantization_report.json",
+    'use_quantized_model': False,  # Hanya dipakai jika report quantization lolos accuracy gate
+    'quantization_gate': {
+        'max_map_drop': 0.02,      # Maksimal penurunan mAP50-95 dibanding model float
+        'max_recall_drop': 0.03    # Maksimal penurunan recall per class wajib
+    },
+    'confidence_threshold': 0.35,
+    'required_objects': ['NAME TAG', 'PIN CITA CITA', 'ID CARD'],
+    'detection_duration': 6,  # 6 detik proses deteksi
+    'jam_masuk': "07:00",  # Tap setelah jam ini dihitung terlambat (laporan/arsip)
+    'servo_pin': 18,
+    'default_angle': 50,
+    'min_confidence': 0.5,  # Minimal confidence untuk dianggap terdeteksi
+    'speculative_detection': True,  # Mulai kamera + inferensi saat tap, paralel dengan cek kartu
+    'motion_gate': {
+        'enabled': True,
+        'size': (160, 120),       # Resolusi kecil untuk frame differencing
+        'motion_threshold': 4.0,  # Rata-rata selisih piksel minimal (0-255)
+        'blur_threshold': 20.0,   # Variance Laplacian minimal
+        'min_brightness': 25,
+        'max_brightness': 235,
+        'max_skip': 5             # Paksa inferensi setelah 5 frame berturut-turut di-skip
+    },
+    'adaptive_inference': {
+        'enabled': True,
+        'latency_budget_ms': 250,  # Budget latency inferensi per frame
+        'max_temp_c': 75.0,        # Turunkan level jika CPU lebih panas dari ini
+        'smoothing': 0.3,          # Bobot EWMA latency
+        'cooldown_frames': 10,     # Minimal frame antar perubahan level
+        'upgrade_ratio': 0.8,      # Naik level jika perkiraan latency di level atas < 80% budget
+        'levels': [
+            {'imgsz': 640, 'stride': 1, 'roi': 1.0},
+            {'imgsz': 512, 'stride': 1, 'roi': 0.9},
+            {'imgsz': 416, 'stride': 2, 'roi': 0.8},
+            {'imgsz': 320, 'stride': 3, 'roi': 0.7}
+        ]
+    },
+    'tracker': {
+        'enabled': True,
+        'type': 'KCF',             # KCF / CSRT / MIL (fallback ke MIL)
+        'detect_every': 3,         # YOLO setiap 3 frame, tracker di antaranya
+        'confidence_decay': 0.97   # Confidence track turun per frame tanpa detector
+    },
+    'evidence': {
+        'enabled': True,
+        'dir': "evidence",
+        'format': 'jpg',           # jpg atau webp
+        'quality': 85,
+        'only_failed': False,      # True = hanya simpan evidence sesi GAGAL
+        'max_sessions': 2000,      # Rotasi: hapus sesi terlama jika lebih dari ini
+        'max_mb': 1024,            # Rotasi: batas total ukuran folder evidence
+        'queue_size': 8            # Sesi yang menunggu ditulis, lebih dari ini di-drop
+    },
+    'inference_server': {
+        'enabled': False,          # True = pakai model dari inference_server.py, bukan YOLO lokal
+        'host': '127.0.0.1',
+        'port': 6000,
+        'authkey_env': 'SLV_INFERENCE_AUTHKEY',  # Authkey dari environment variable ini...
+        'authkey_file': None,      # ...atau dari file ini. Wajib di-set jika host bukan loopback
+        'stream_id': 'gerbang-1',  # Nama kiosk/kamera untuk statistik per stream
+        'max_batch': 8,            # Maksimal frame dalam satu pemanggilan model
+        'max_wait_ms': 10,         # Tunggu frame dari stream lain sebelum batch dijalankan
+        'report_interval': 30      # Detik antar laporan throughput/latency per stream
+    },
+    'multi_gate': {
+        'enabled': False,          # True = simpan ke log per gerbang (gabungkan dengan gate_store.py merge)
+        'gate_id': 'gerbang-1',
+        'log_dir': "presensi_logs" # Folder yang direplikasi antar gerbang
+    },
+    'supervisor': {
+        'retry_delay': 0.5,        # Jeda awal jika recovery gagal (naik 2x sampai max)
+        'max_retry_delay': 30.0,
+        'rfid_error_limit': 10,    # Buat ulang reader setelah N error RFID berturut-turut
+        'idle_check_interval': 60.0,  # Detik antar health check kamera/model/mixer di layar tunggu
+        'max_inference_error_ratio': 0.2  # Sesi GAGAL dibuang jika error inferensi > 20% frame yang berhasil
+    },
+    'roster': {
+        'enabled': True,           # Kartu dicek ke roster sebelum kamera/model bekerja
+        'path': "roster.csv",      # card_id,nama,jurusan,angkatan (buat awal: python roster.py build)
+        'check_interval': 2.0,     # Detik antar cek mtime roster untuk hot-reload
+        'secret': None,            # Kunci HMAC payload kartu (python roster.py sign), None = signature tidak dicek
+        'require_signature': False,  # True = kartu tanpa signature ditolak
+        'signature_length': 16     # Karakter hex signature (teks SimpleMFRC522 maksimal 48 karakter)
+    },
+    'profiling': {
+        'enabled': False,          # True = catat RSS, fd, thread dan alokasi per sesi (diagnosa leak)
+        'log_file': "profiling/resource_log.jsonl",
+        'max_mb': 10,              # Log dirotasi jika lebih dari ini
+        'backup_count': 5,
+        'tracemalloc': True,       # Alokasi Python per baris kode (overhead memori ~2x saat aktif)
+        'tracemalloc_frames': 5,
+        'snapshot_every': 10,      # Snapshot tracemalloc tiap N sesi (snapshot mahal)
+        'top_n': 10,
+        'trend_window': 50         # Jumlah sampel untuk menghitung tren pertumbuhan
+    },
+    'audio_files': {
+        'no_card': "Tanpa Kartu aku~.mp3",
+        'all_attributes': "semua atribut lengkap.mp3", 
+        'violation': "pelanggaran.mp3",
+        'already_tapped': "sudah_tap_hari_ini.mp3"  # Audio baru untuk sudah tap
+    },
+    'video_files': {
+        'normal': "normal.mp4",
+        'happy': "senang.mp4", 
+        'ledek': "ledek.mp4",
+        'already_tapped': "sudah_tap_hari_ini.mp4"  # Video baru untuk sudah tap
+    }
+}
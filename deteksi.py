@@ -0,0 +1,555 @@
+import json
+import os
+import time
+from collections import deque
+
+import cv2
+
+# =============================
+# PEMILIHAN MODEL
+# =============================
+
+def select_model_path(config):
+    """Pilih model INT8 hanya jika report quantization lolos accuracy gate di setiap imgsz adaptive"""
+    if not config['use_quantized_model']:
+        return config['model_path']
+    
+    try:
+        with open(config['quantization_report'], 'r') as f:
+            report = json.load(f)
+        
+        same_model = os.path.normpath(report.get('int8_model', '')) == os.path.normpath(config['quantized_model_path'])
+        # Controller bisa turun ke imgsz mana saja, jadi semua level harus tervalidasi dan lolos
+        levels = report.get('levels', {})
+        failed_levels = [level['imgsz'] for level in config['adaptive_inference']['levels']
+                         if not levels.get(str(level['imgsz']), {}).get('passed')]
+        if not same_model:
+            print("⚠️  Quantization report bukan untuk quantized_model_path, memakai model float")
+        elif failed_levels:
+            print(f"⚠️  Quantized model tidak lolos/tidak divalidasi di imgsz {failed_levels}, memakai model float")
+        elif report.get('passed') and os.path.exists(config['quantized_model_path']):
+            print(f"⚡ Quantized model lolos gate (speedup {report.get('speedup', 0):.2f}x)")
+            return config['quantized_model_path']
+        else:
+            print("⚠️  Quantized model tidak lolos accuracy gate, memakai model float")
+    except Exception as e:
+        print(f"⚠️  Quantization report tidak bisa dibaca ({e}), memakai model float")
+    
+    return config['model_path']
+
+# =============================
+# DETECTION MANAGER SEDERHANA
+# =============================
+
+class SimpleDetectionManager:
+    def __init__(self, required_objects, min_confidence):
+        self.required_objects = required_objects
+        self.min_confidence = min_confidence
+        self.reset()
+        
+    def update_detections(self, detections):
+        """Update deteksi objek (dari detector maupun tracker)"""
+        for detection in detections:
+            class_name = detection['class_name']
+            confidence = detection['confidence']
+            
+            if confidence >= self.min_confidence:
+                self.detected_objects.add(class_name)
+                self.evidence_frames[class_name] = self.evidence_frames.get(class_name, 0) + 1
+                
+                # Simpan confidence tertinggi
+                if class_name not in self.highest_confidence or confidence > self.highest_confidence[class_name]:
+                    self.highest_confidence[class_name] = confidence
+            
+            # Identitas track: berapa frame objek yang sama terus terlihat
+            track_id = detection.get('track_id')
+            if track_id is not None:
+                track = self.tracks.setdefault(track_id, {
+                    'class_name': class_name,
+                    'hits': 0,
+                    'best_confidence': 0.0
+                })
+                track['hits'] += 1
+                track['best_confidence'] = max(track['best_confidence'], confidence)
+    
+    def get_results(self):
+        """Hasil akhir deteksi"""
+        return {
+            'detected_objects': list(self.detected_objects),
+            'missing_objects': [obj for obj in self.required_objects if obj not in self.detected_objects],
+            'confidence_scores': self.highest_confidence,
+            'success': len(self.detected_objects) == len(self.required_objects),
+            'detected_count': len(self.detected_objects),
+            'total_required': len(self.required_objects),
+            'evidence_frames': dict(self.evidence_frames),
+            'track_count': len(self.tracks)
+        }
+    
+    def reset(self):
+        """Reset untuk deteksi baru"""
+        self.detected_objects = set()
+        self.highest_confidence = {}
+        self.evidence_frames = {}
+        self.tracks = {}
+
+def extract_detections(results, names, required_objects, offset=(0, 0)):
+    """Ubah output YOLO menjadi list deteksi objek wajib (box dalam koordinat frame penuh)"""
+    detections = []
+    offset_x, offset_y = offset
+    
+    if results and len(results) > 0:
+        boxes = results[0].boxes
+        
+        if boxes is not None:
+            for box in boxes:
+                confidence = box.conf.item()
+                class_id = int(box.cls.item())
+                class_name = names[class_id]
+                
+                if class_name in required_objects:
+                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
+                    
+                    detections.append({
+                        'class_name': class_name,
+                        'confidence': confidence,
+                        'box': (int(x1) + offset_x, int(y1) + offset_y, int(x2) + offset_x, int(y2) + offset_y),
+                        'source': 'detector'
+                    })
+    
+    return detections
+
+# =============================
+# PRE-FILTER FRAME (MOTION / PRESENCE GATE)
+# =============================
+
+def small_gray(frame, size=(160, 120)):
+    """Frame grayscale kecil untuk scoring murah"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return cv2.resize(gray, tuple(size), interpolation=cv2.INTER_AREA)
+
+def frame_sharpness(frame, size=(160, 120)):
+    """Variance Laplacian dari frame kecil - makin besar makin tajam"""
+    return float(cv2.Laplacian(small_gray(frame, size), cv2.CV_64F).var())
+
+class FrameGate:
+    """Filter murah sebelum YOLO: lewati frame statis, blur, atau over/under exposure"""
+
+    def __init__(self, size=(160, 120), motion_threshold=4.0, blur_threshold=20.0,
+                 min_brightness=25, max_brightness=235, max_skip=5):
+        self.size = tuple(size)
+        self.motion_threshold = motion_threshold
+        self.blur_threshold = blur_threshold
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_skip = max_skip
+        self.reset()
+
+    def reset(self):
+        """Reset untuk sesi baru"""
+        self.reference = None
+        self.consecutive_skips = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.skip_reasons = {'static': 0, 'blur': 0, 'exposure': 0}
+
+    def _score(self, frame):
+        """Downscale ke grayscale kecil lalu hitung brightness dan ketajaman"""
+        small = small_gray(frame, self.size)
+        brightness = float(small.mean())
+        sharpness = float(cv2.Laplacian(small, cv2.CV_64F).var())
+        return small, brightness, sharpness
+
+    def check(self, frame):
+        """Return (jalankan_inferensi, alasan). Alasan None jika frame diproses"""
+        small, brightness, sharpness = self._score(frame)
+
+        reason = None
+        if brightness < self.min_brightness or brightness > self.max_brightness:
+            reason = 'exposure'
+        elif sharpness < self.blur_threshold:
+            reason = 'blur'
+        elif self.reference is not None:
+            # Bandingkan dengan frame terakhir yang diinferensi, bukan frame sebelumnya,
+            # supaya gerakan pelan tetap terakumulasi
+            motion = float(cv2.absdiff(small, self.reference).mean())
+            if motion < self.motion_threshold:
+                reason = 'static'
+
+        # Jangan pernah menunda terlalu lama - paksa inferensi setelah max_skip frame
+        if reason is not None and self.consecutive_skips < self.max_skip:
+            self.consecutive_skips += 1
+            self.skipped += 1
+            self.skip_reasons[reason] += 1
+            return False, reason
+
+        self.reference = small
+        self.consecutive_skips = 0
+        self.inferred += 1
+        return True, None
+
+    def get_stats(self):
+        """Statistik gate untuk metrik sesi"""
+        return {
+            'inferred': self.inferred,
+            'skipped': self.skipped,
+            'skip_reasons': dict(self.skip_reasons)
+        }
+
+# =============================
+# ADAPTIVE INFERENCE CONTROLLER
+# =============================
+
+def read_cpu_temp(path="/sys/class/thermal/thermal_zone0/temp"):
+    """Membaca suhu CPU (Celsius), None jika tidak tersedia"""
+    try:
+        with open(path, 'r') as f:
+            return int(f.read().strip()) / 1000.0
+    except Exception:
+        return None
+
+def crop_roi(frame, roi):
+    """Crop bagian tengah frame sesuai rasio roi, return (crop, (offset_x, offset_y))"""
+    if roi >= 1.0:
+        return frame, (0, 0)
+    h, w = frame.shape[:2]
+    crop_w, crop_h = int(w * roi), int(h * roi)
+    x0, y0 = (w - crop_w) // 2, (h - crop_h) // 2
+    return frame[y0:y0 + crop_h, x0:x0 + crop_w], (x0, y0)
+
+class AdaptiveInferenceController:
+    """Atur imgsz, frame stride dan ROI supaya latency inferensi tetap dalam budget"""
+
+    def __init__(self, levels, latency_budget_ms=250, max_temp_c=75.0, smoothing=0.3,
+                 cooldown_frames=10, upgrade_ratio=0.8, temp_interval=1.0):
+        self.levels = levels
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.max_temp_c = max_temp_c
+        self.smoothing = smoothing
+        self.cooldown_frames = cooldown_frames
+        self.upgrade_ratio = upgrade_ratio
+        self.temp_interval = temp_interval
+
+        self.level = 0
+        self.avg_latency = None
+        self.cpu_temp = None
+        self.frames_since_change = 0
+        self.last_temp_read = 0.0
+        self.adjustments = deque(maxlen=100)
+
+    def current(self):
+        """Setting level saat ini: {'imgsz', 'stride', 'roi'}"""
+        return self.levels[self.level]
+
+    def _update_temp(self, now):
+        if now - self.last_temp_read >= self.temp_interval:
+            self.cpu_temp = read_cpu_temp()
+            self.last_temp_read = now
+
+    def record(self, latency, now):
+        """Catat latency satu inferensi (detik) lalu sesuaikan level bila perlu"""
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = self.smoothing * latency + (1 - self.smoothing) * self.avg_latency
+        self._update_temp(now)
+        self.frames_since_change += 1
+
+        if self.frames_since_change < self.cooldown_frames:
+            return
+
+        too_hot = self.cpu_temp is not None and self.cpu_temp >= self.max_temp_c
+        if (self.avg_latency > self.latency_budget or too_hot) and self.level < len(self.levels) - 1:
+            reason = "temp" if too_hot else "latency"
+            self._change(self.level + 1, reason, now)
+        elif self.level > 0 and not too_hot:
+            # Perkiraan latency di level atas (skala dengan jumlah piksel) supaya tidak osilasi
+            scale = (self.levels[self.level - 1]['imgsz'] / self.current()['imgsz']) ** 2
+            if self.avg_latency * scale < self.latency_budget * self.upgrade_ratio:
+                self._change(self.level - 1, "headroom", now)
+
+    def _change(self, new_level, reason, now):
+        old_level = self.level
+        self.level = new_level
+        self.frames_since_change = 0
+        setting = self.current()
+        temp_text = f"{self.cpu_temp:.1f}°C" if self.cpu_temp is not None else "n/a"
+
+        self.adjustments.append({
+            'time': now,
+            'from': old_level,
+            'to': new_level,
+            'reason': reason,
+            'avg_latency_ms': round(self.avg_latency * 1000, 1),
+            'cpu_temp': self.cpu_temp
+        })
+        print(f"⚙️  Adaptive inference: level {old_level} -> {new_level} ({reason}, "
+              f"latency {self.avg_latency * 1000:.0f}ms / budget {self.latency_budget * 1000:.0f}ms, "
+              f"temp {temp_text}) imgsz={setting['imgsz']} stride={setting['stride']} roi={setting['roi']}")
+
+# =============================
+# TRACKER DI ANTARA FRAME DETEKSI
+# =============================
+
+TRACKER_FACTORIES = {
+    'KCF': 'TrackerKCF_create',
+    'CSRT': 'TrackerCSRT_create',
+    'MIL': 'TrackerMIL_create'
+}
+
+def create_cv_tracker(kind):
+    """Membuat tracker OpenCV, fallback ke MIL jika build OpenCV tidak punya tipe yang diminta"""
+    for name in (kind, 'MIL'):
+        factory = TRACKER_FACTORIES.get(name)
+        for namespace in (cv2, getattr(cv2, 'legacy', None)):
+            if factory and namespace is not None and hasattr(namespace, factory):
+                return getattr(namespace, factory)()
+    return None
+
+def box_iou(a, b):
+    """IoU dua box (x1, y1, x2, y2)"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+class AttributeTracker:
+    """Tracker ringan untuk box terakhir dari YOLO, dipakai di antara frame deteksi"""
+
+    def __init__(self, kind='KCF', confidence_decay=0.97, iou_match=0.3):
+        self.kind = kind
+        self.confidence_decay = confidence_decay
+        self.iou_match = iou_match
+        self.next_id = 1
+        self.reset()
+
+    def reset(self):
+        """Reset untuk sesi baru"""
+        self.tracks = []
+
+    def active(self):
+        return len(self.tracks) > 0
+
+    def _match_id(self, detection, used_ids):
+        """Pakai ulang track_id jika box baru overlap dengan track lama dari class yang sama"""
+        best_id, best_iou = None, self.iou_match
+        for track in self.tracks:
+            if track['class_name'] != detection['class_name'] or track['id'] in used_ids:
+                continue
+            iou = box_iou(track['box'], detection['box'])
+            if iou >= best_iou:
+                best_id, best_iou = track['id'], iou
+        if best_id is None:
+            best_id = self.next_id
+            self.next_id += 1
+        return best_id
+
+    def start(self, frame, detections):
+        """Inisialisasi ulang tracker dari hasil detector (menambahkan track_id ke deteksi)"""
+        new_tracks = []
+        used_ids = set()
+        
+        for detection in detections:
+            track_id = self._match_id(detection, used_ids)
+            used_ids.add(track_id)
+            detection['track_id'] = track_id
+            
+            x1, y1, x2, y2 = detection['box']
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+            tracker = create_cv_tracker(self.kind)
+            if tracker is None:
+                continue
+            tracker.init(frame, (x1, y1, x2 - x1, y2 - y1))
+            
+            new_tracks.append({
+                'id': track_id,
+                'class_name': detection['class_name'],
+                'confidence': detection['confidence'],
+                'box': detection['box'],
+                'tracker': tracker
+            })
+        
+        self.tracks = new_tracks
+
+    def update(self, frame):
+        """Update semua track, confidence menurun setiap frame tanpa konfirmasi detector"""
+        detections = []
+        alive = []
+        
+        for track in self.tracks:
+            ok, (x, y, w, h) = track['tracker'].update(frame)
+            if not ok:
+                continue
+            
+            track['confidence'] *= self.confidence_decay
+            track['box'] = (int(x), int(y), int(x + w), int(y + h))
+            alive.append(track)
+            
+            detections.append({
+                'class_name': track['class_name'],
+                'confidence': track['confidence'],
+                'box': track['box'],
+                'track_id': track['id'],
+                'source': 'track'
+            })
+        
+        self.tracks = alive
+        return detections
+
+# =============================
+# PIPELINE DETEKSI PER FRAME
+# =============================
+
+class DetectionPipeline:
+    """Gabungan gate, controller, YOLO dan tracker untuk satu sesi deteksi"""
+
+    def __init__(self, model, config, manager, gate=None, controller=None, tracker=None):
+        self.model = model
+        self.config = config
+        self.manager = manager
+        self.gate = gate
+        self.controller = controller
+        self.tracker = tracker
+        self.reset()
+
+    def reset(self):
+        """Reset untuk sesi baru (controller sengaja tidak di-reset)"""
+        self.manager.reset()
+        if self.gate is not None:
+            self.gate.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.frame_index = 0
+        self.last_detect_index = None
+        self.last_detections = []
+        self.inference_times = []
+        self.inference_errors = 0
+        self.last_inference_error = None
+        self.tracked_frames = 0
+        self.stride_skipped = 0
+        self.best_evidence = {}
+        self.scene_frame = None
+        self.scene_sharpness = -1.0
+
+    def current_setting(self):
+        if self.controller is not None:
+            return self.controller.current()
+        return self.config['adaptive_inference']['levels'][0]
+
+    def detect(self, frame, setting):
+        """Jalankan YOLO pada ROI frame"""
+        roi_frame, offset = crop_roi(frame, setting['roi'])
+        
+        inference_start = time.time()
+        if hasattr(self.model, 'detect_objects'):
+            # Model remote (inference server) langsung mengembalikan deteksi
+            detections = self.model.detect_objects(roi_frame,
+                                                   conf=self.config['confidence_threshold'],
+                                                   imgsz=setting['imgsz'],
+                                                   offset=offset)
+        else:
+            results = self.model(roi_frame,
+                                 conf=self.config['confidence_threshold'],
+                                 verbose=False,
+                                 imgsz=setting['imgsz'])
+            detections = extract_detections(results, self.model.names, self.config['required_objects'], offset)
+        inference_end = time.time()
+        self.inference_times.append(inference_end - inference_start)
+        
+        if self.controller is not None:
+            self.controller.record(inference_end - inference_start, inference_end)
+        
+        return detections
+
+    def keep_evidence(self, frame, detections):
+        """Simpan referensi frame dengan confidence tertinggi per class (hanya dari detector)"""
+        for detection in detections:
+            class_name = detection['class_name']
+            best = self.best_evidence.get(class_name)
+            if best is None or detection['confidence'] > best['confidence']:
+                self.best_evidence[class_name] = {
+                    'confidence': detection['confidence'],
+                    'box': detection['box'],
+                    'frame': frame
+                }
+
+    def keep_scene(self, frame):
+        """Simpan frame paling tajam yang sampai ke detector - evidence sesi tanpa deteksi sama sekali"""
+        sharpness = frame_sharpness(frame)
+        if sharpness > self.scene_sharpness:
+            self.scene_frame = frame
+            self.scene_sharpness = sharpness
+
+    def get_evidence(self):
+        """Frame terbaik per class untuk evidence snapshot"""
+        return dict(self.best_evidence)
+
+    def get_scene(self):
+        """Frame representatif sesi (None jika belum ada frame yang diproses)"""
+        return self.scene_frame
+
+    def process(self, frame):
+        """Proses satu frame kamera, return deteksi yang perlu digambar"""
+        self.frame_index += 1
+        setting = self.current_setting()
+        
+        # Dengan tracker, detector cukup jalan setiap detect_every * stride frame
+        interval = setting['stride']
+        if self.tracker is not None:
+            interval *= self.config['tracker']['detect_every']
+        detect_due = self.last_detect_index is None or self.frame_index - self.last_detect_index >= interval
+        
+        if not detect_due and (self.tracker is None or not self.tracker.active()):
+            self.stride_skipped += 1
+            return self.last_detections
+        
+        # Pre-filter: frame statis/blur/gelap tidak perlu diproses
+        if self.gate is not None:
+            run, skip_reason = self.gate.check(frame)
+            if not run:
+                return self.last_detections
+        
+        if detect_due:
+            # Diambil sebelum inferensi supaya sesi dengan inferensi gagal tetap punya gambar
+            self.keep_scene(frame)
+            try:
+                detections = self.detect(frame, setting)
+            except Exception as e:
+                # Dicatat supaya sesi tanpa inferensi yang berhasil tidak dianggap GAGAL biasa
+                self.inference_errors += 1
+                self.last_inference_error = str(e)
+                raise
+            self.last_detect_index = self.frame_index
+            self.keep_evidence(frame, detections)
+            if self.tracker is not None:
+                self.tracker.start(frame, detections)
+        else:
+            detections = self.tracker.update(frame)
+            self.tracked_frames += 1
+        
+        self.manager.update_detections(detections)
+        self.last_detections = detections
+        return detections
+
+    def get_metrics(self):
+        """Metrik sesi: jumlah frame diinferensi, di-track dan di-skip"""
+        gate_stats = self.gate.get_stats() if self.gate is not None else {'skipped': 0, 'skip_reasons': {}}
+        skip_reasons = dict(gate_stats['skip_reasons'])
+        skip_reasons['stride'] = self.stride_skipped
+        
+        avg_inference_ms = 0.0
+        if self.inference_times:
+            avg_inference_ms = sum(self.inference_times) / len(self.inference_times) * 1000
+        
+        return {
+            'frames': self.frame_index,
+            'frames_inferred': len(self.inference_times),
+            'inference_errors': self.inference_errors,
+            'last_inference_error': self.last_inference_error,
+            'frames_tracked': self.tracked_frames,
+            'frames_skipped': gate_stats['skipped'] + self.stride_skipped,
+            'skip_reasons': skip_reasons,
+            'avg_inference_ms': round(avg_inference_ms, 1),
+            'inference_level': self.controller.level if self.controller is not None else 0
+        }
@@ -0,0 +1,268 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+# =============================
+# PENYIMPANAN PRESENSI MULTI-GERBANG
+# =============================
+#
+# Setiap gerbang hanya menulis ke log miliknya sendiri (<log_dir>/<gate_id>.jsonl),
+# jadi tidak ada konflik tulis walaupun folder log direplikasi (rsync/syncthing/NFS).
+# Setiap entry punya gate_id dan seq yang naik terus. Jika dua gerbang menerima kartu
+# yang sama di hari yang sama, yang menang selalu entry paling awal menurut
+# (timestamp, gate_id, seq) - hasil merge sama di semua node, urutan baca tidak berpengaruh.
+
+def merge_key(entry):
+    """Urutan deterministik untuk memilih entry pemenang"""
+    return (entry.get('timestamp', ''), entry.get('gate_id', ''), entry.get('seq', 0))
+
+def iter_log(path, offset=0):
+    """Baca entry lengkap dari offset, return (list entry, offset baru). Baris terakhir yang
+    belum selesai ditulis dibiarkan untuk pembacaan berikutnya"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+
+    end = chunk.rfind(b'\n')
+    if end < 0:
+        return [], offset
+
+    entries = []
+    for line in chunk[:end].splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            print(f"⚠️ Baris log rusak di {path}, dilewati")
+    return entries, offset + end + 1
+
+class GateStore:
+    """Log append-only untuk gerbang ini + index replika lokal untuk cek tap lintas gerbang"""
+
+    def __init__(self, log_dir, gate_id):
+        self.log_dir = log_dir
+        self.gate_id = gate_id
+        self.log_path = os.path.join(log_dir, f"{gate_id}.jsonl")
+        self.lock = threading.Lock()
+        self.offsets = {}
+        self.seq = 0
+        self.index_date = None
+        self.index = {}
+
+        os.makedirs(log_dir, exist_ok=True)
+        self.refresh()
+
+    def _apply(self, entry):
+        if entry.get('gate_id') == self.gate_id:
+            self.seq = max(self.seq, entry.get('seq', 0))
+
+        # Index hanya menyimpan tap hari ini - cukup untuk cek sudah tap, memori tetap kecil
+        if entry.get('tanggal') != self.index_date:
+            return
+        key = (entry.get('card_id'), entry.get('tanggal'))
+        current = self.index.get(key)
+        if current is None or merge_key(entry) < merge_key(current):
+            self.index[key] = entry
+
+    def refresh(self):
+        """Baca entry baru dari semua log lokal (termasuk replika gerbang lain) secara incremental"""
+        with self.lock:
+            today = date.today().isoformat()
+            if today != self.index_date:
+                # Ganti hari: bangun ulang index dari awal
+                self.index_date = today
+                self.index = {}
+                self.offsets = {}
+
+            for path in glob.glob(os.path.join(self.log_dir, "*.jsonl")):
+                entries, self.offsets[path] = iter_log(path, self.offsets.get(path, 0))
+                for entry in entries:
+                    self._apply(entry)
+
+    def append(self, record):
+        """Tambah record presensi ke log gerbang ini dengan gate_id dan seq"""
+        with self.lock:
+            self.seq += 1
+            entry = dict(record, gate_id=self.gate_id, seq=self.seq)
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(entry)
+            return entry
+
+    def find_tap(self, card_id, tanggal):
+        """Cari tap kartu di tanggal tertentu dari semua gerbang - tanpa network round trip"""
+        self.refresh()
+        with self.lock:
+            return self.index.get((card_id, tanggal))
+
+# =============================
+# MERGE SEMUA LOG MENJADI SATU VIEW
+# =============================
+
+def merge_logs(log_dir, legacy_file=None):
+    """Gabungkan log semua gerbang: satu record per (card_id, tanggal), urut waktu"""
+    winners = {}
+    seen = set()
+
+    def consider(entry):
+        # Entry yang sama bisa muncul dua kali jika log tersalin ganda
+        identity = (entry.get('gate_id'), entry.get('seq'))
+        if identity in seen:
+            return
+        seen.add(identity)
+
+        key = (entry.get('card_id'), entry.get('tanggal'))
+        current = winners.get(key)
+        if current is None or merge_key(entry) < merge_key(current):
+            winners[key] = entry
+
+    if legacy_file and os.path.exists(legacy_file):
+        with open(legacy_file, 'r') as f:
+            for i, record in enumerate(json.load(f)):
+                consider(dict(record, gate_id=record.get('gate_id', 'legacy'), seq=record.get('seq', i + 1)))
+
+    for path in sorted(glob.glob(os.path.join(log_dir, "*.jsonl"))):
+        entries, _ = iter_log(path)
+        for entry in entries:
+            consider(entry)
+
+    return sorted(winners.values(), key=merge_key)
+
+def write_merged_view(log_dir, output, legacy_file=None):
+    """Tulis view gabungan secara atomic (dashboard tidak pernah membaca file setengah jadi)"""
+    records = merge_logs(log_dir, legacy_file)
+    tmp_path = output + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(records, f, indent=4)
+    os.replace(tmp_path, output)
+    return len(records)
+
+# =============================
+# SIMULASI BEBERAPA GERBANG (PROSES LOKAL)
+# =============================
+
+def simulate_gate(log_dir, gate_id, cards, taps, seed):
+    """Satu proses = satu gerbang yang menerima tap acak"""
+    rng = random.Random(seed)
+    store = GateStore(log_dir, gate_id)
+    accepted = rejected = 0
+
+    for _ in range(taps):
+        card_id = rng.choice(cards)
+        today = date.today().isoformat()
+        if store.find_tap(card_id, today):
+            rejected += 1
+        else:
+            store.append({
+                'card_id': card_id,
+                'nama': f"Siswa {card_id}",
+                'status': "BERHASIL",
+                'timestamp': datetime.now().isoformat(),
+                'tanggal': today
+            })
+            accepted += 1
+        time.sleep(rng.uniform(0, 0.005))
+
+    print(f"   {gate_id}: diterima {accepted}, ditolak (sudah tap) {rejected}")
+
+def find_late_duplicates(entries, race_window):
+    """Kartu yang diterima lebih dari sekali per hari dengan selisih di atas race_window detik.
+    Duplikat di dalam window = race wajar (dua gerbang cek sebelum log saling terbaca)"""
+    taps = {}
+    for entry in entries:
+        key = (entry.get('card_id'), entry.get('tanggal'))
+        taps.setdefault(key, []).append(datetime.fromisoformat(entry['timestamp']))
+
+    late = {}
+    for key, times in taps.items():
+        spread = (max(times) - min(times)).total_seconds()
+        if len(times) > 1 and spread > race_window:
+            late[key] = spread
+    return len(taps), late
+
+def simulate(gates, taps, card_count, race_window=0.05):
+    log_dir = tempfile.mkdtemp(prefix="gate_sim_")
+    cards = [str(900000000000 + i) for i in range(card_count)]
+    print(f"🧪 Simulasi {gates} gerbang, {taps} tap per gerbang, {card_count} kartu ({log_dir})")
+
+    processes = [multiprocessing.Process(target=simulate_gate,
+                                         args=(log_dir, f"gerbang-{i + 1}", cards, taps, i))
+                 for i in range(gates)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # Yang dicek adalah entry mentah yang diterima gerbang, bukan hasil merge (merge selalu 1 per kartu)
+    entries = []
+    for path in glob.glob(os.path.join(log_dir, "*.jsonl")):
+        entries.extend(iter_log(path)[0])
+    card_days, late = find_late_duplicates(entries, race_window)
+    merged = merge_logs(log_dir)
+
+    print(f"📊 Entry di semua log: {len(entries)}, kartu-hari unik: {card_days}")
+    print(f"📊 Record setelah merge: {len(merged)} (race antar gerbang diselesaikan: {len(entries) - card_days})")
+    for (card_id, tanggal), spread in sorted(late.items())[:10]:
+        print(f"   ❌ {card_id} {tanggal}: diterima lagi setelah {spread:.3f}s")
+
+    ok = not late and len(merged) == card_days and all(process.exitcode == 0 for process in processes)
+    print(f"{'✅' if ok else '❌'} Tap ulang ditolak di semua gerbang (duplikat hanya dalam race {race_window}s): {ok}")
+
+    shutil.rmtree(log_dir, ignore_errors=True)
+    return ok
+
+def is_gate_log(path, log_dir):
+    return os.path.abspath(path) in {os.path.abspath(log) for log in glob.glob(os.path.join(log_dir, "*.jsonl"))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge dan simulasi presensi multi-gerbang")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    merge_parser = subparsers.add_parser('merge', help="Gabungkan log semua gerbang ke satu file JSON")
+    merge_parser.add_argument('--log-dir', default="presensi_logs")
+    merge_parser.add_argument('--output', default="presensi.json")
+    merge_parser.add_argument('--legacy', help="presensi.json lama dari sebelum mode multi-gerbang "
+                                               "(default: --output jika sudah ada)")
+    merge_parser.add_argument('--force', action='store_true',
+                              help="Timpa --output tanpa ikut menggabungkan isinya (riwayat lama hilang)")
+    merge_parser.add_argument('--watch', type=float, help="Ulangi merge setiap N detik")
+
+    sim_parser = subparsers.add_parser('simulate', help="Uji beberapa gerbang dengan proses lokal")
+    sim_parser.add_argument('--gates', type=int, default=3)
+    sim_parser.add_argument('--taps', type=int, default=200)
+    sim_parser.add_argument('--cards', type=int, default=50)
+    sim_parser.add_argument('--race-window', type=float, default=0.05,
+                            help="Selisih maksimal (detik) dua tap kartu yang sama yang masih dianggap race")
+
+    args = parser.parse_args()
+
+    if args.command == 'merge':
+        if is_gate_log(args.output, args.log_dir):
+            raise SystemExit(f"❌ {args.output} adalah log gerbang, pilih file output lain")
+        if args.legacy is None and not args.force and os.path.exists(args.output):
+            # Riwayat sebelum multi-gerbang ada di output - ikut digabung, bukan ditimpa
+            print(f"📦 {args.output} sudah ada, isinya ikut digabung (--force untuk menimpa)")
+            args.legacy = args.output
+        while True:
+            count = write_merged_view(args.log_dir, args.output, args.legacy)
+            print(f"✅ {count} record digabung ke {args.output}")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    elif not simulate(args.gates, args.taps, args.cards, args.race_window):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import argparse
+import ipaddress
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+from ultralytics import YOLO
+
+from config import CONFIG
+from deteksi import extract_detections, select_model_path
+
+# =============================
+# INFERENCE SERVER BERSAMA UNTUK BEBERAPA KIOSK / KAMERA
+# =============================
+#
+# multiprocessing.connection meng-unpickle semua pesan setelah autentikasi, jadi authkey
+# sama dengan akses eksekusi kode di server. Authkey tidak pernah disimpan di repo.
+
+LOCAL_KEY_FILE = os.path.expanduser("~/.slv_inference_key")
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+def local_authkey():
+    """Key acak per host (mode 0600) untuk server dan kiosk di mesin yang sama"""
+    try:
+        fd = os.open(LOCAL_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+    except FileExistsError:
+        pass
+    with open(LOCAL_KEY_FILE, 'r') as f:
+        return f.read().strip().encode()
+
+def load_authkey(server_config, host):
+    """Authkey dari environment / file. Tanpa key privat hanya loopback yang diizinkan"""
+    key = os.environ.get(server_config['authkey_env'])
+    if not key and server_config['authkey_file']:
+        with open(server_config['authkey_file'], 'r') as f:
+            key = f.read().strip()
+    if key:
+        return key.encode()
+
+    if not is_loopback(host):
+        raise ValueError(f"Host {host} bukan loopback: set {server_config['authkey_env']} atau "
+                         f"CONFIG['inference_server']['authkey_file'] dengan key privat")
+    return local_authkey()
+
+class StreamStats:
+    """Throughput dan latency untuk satu stream (kiosk/kamera)"""
+
+    def __init__(self):
+        self.frames = 0
+        self.frames_at_last_report = 0
+        self.latencies = deque(maxlen=500)
+        self.batch_sizes = deque(maxlen=500)
+
+    def record(self, latency, batch_size):
+        self.frames += 1
+        self.latencies.append(latency)
+        self.batch_sizes.append(batch_size)
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        new_frames = self.frames - self.frames_at_last_report
+        self.frames_at_last_report = self.frames
+        return {
+            'frames': self.frames,
+            'fps': new_frames / elapsed if elapsed > 0 else 0.0,
+            'avg_latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p95_latency_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0,
+            'avg_batch': sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else 0.0
+        }
+
+class InferenceServer:
+    """Satu proses memegang model, frame dari banyak stream digabung menjadi satu batch"""
+
+    def __init__(self, model, address, authkey, max_batch=8, max_wait_ms=10, report_interval=30):
+        self.model = model
+        self.address = address
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.report_interval = report_interval
+        self.requests = queue.Queue()
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def serve_forever(self):
+        listener = Listener(self.address, authkey=self.authkey)
+        print(f"🚀 Inference server listening on {self.address[0]}:{self.address[1]}")
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        threading.Thread(target=self._report_loop, daemon=True).start()
+
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+    def _handle_client(self, conn):
+        """Satu thread per kiosk: terima frame, tunggu hasil batch, kirim balik deteksi"""
+        stream_id = None
+        try:
+            hello = conn.recv()
+            stream_id = hello['stream']
+            with self.stats_lock:
+                self.stats.setdefault(stream_id, StreamStats())
+            conn.send({'names': self.model.names})
+            print(f"🔌 Stream terhubung: {stream_id}")
+
+            while True:
+                message = conn.recv()
+                if message.get('type') == 'ping':
+                    conn.send({'ok': True})
+                    continue
+                request = {
+                    'stream': stream_id,
+                    'frame': message['frame'],
+                    'conf': message['conf'],
+                    'imgsz': message['imgsz'],
+                    'received': time.time(),
+                    'done': threading.Event(),
+                    'result': None
+                }
+                self.requests.put(request)
+                request['done'].wait()
+                conn.send(request['result'])
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            print(f"🔌 Stream terputus: {stream_id}")
+
+    def _batch_loop(self):
+        """Kumpulkan request sampai max_batch atau max_wait, lalu jalankan model sekali"""
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Argumen model harus sama dalam satu pemanggilan, jadi kelompokkan per imgsz/conf
+        groups = {}
+        for request in batch:
+            groups.setdefault((request['imgsz'], request['conf']), []).append(request)
+
+        for (imgsz, conf), group in groups.items():
+            try:
+                results = self.model([request['frame'] for request in group],
+                                     conf=conf,
+                                     imgsz=imgsz,
+                                     verbose=False)
+                for request, result in zip(group, results):
+                    detections = extract_detections([result], self.model.names, CONFIG['required_objects'])
+                    request['result'] = {'ok': True, 'detections': detections}
+            except Exception as e:
+                for request in group:
+                    request['result'] = {'ok': False, 'error': str(e)}
+
+            now = time.time()
+            with self.stats_lock:
+                for request in group:
+                    self.stats[request['stream']].record(now - request['received'], len(group))
+            for request in group:
+                request['done'].set()
+
+    def _report_loop(self):
+        last_report = time.time()
+        while True:
+            time.sleep(self.report_interval)
+            now = time.time()
+            elapsed = now - last_report
+            last_report = now
+
+            with self.stats_lock:
+                summaries = {stream_id: stats.summary(elapsed) for stream_id, stats in self.stats.items()}
+
+            print(f"\n📊 Inference server - {len(summaries)} stream")
+            for stream_id, summary in summaries.items():
+                print(f"   {stream_id:<15} {summary['fps']:>6.1f} fps  "
+                      f"avg {summary['avg_latency_ms']:>6.1f}ms  p95 {summary['p95_latency_ms']:>6.1f}ms  "
+                      f"batch {summary['avg_batch']:.1f}  total {summary['frames']}")
+
+# =============================
+# CLIENT UNTUK KIOSK
+# =============================
+
+class RemoteInferenceModel:
+    """Pengganti model YOLO lokal di kiosk - frame dikirim ke inference server"""
+
+    def __init__(self, address, authkey, stream_id):
+        self.address = tuple(address)
+        self.authkey = authkey
+        self.stream_id = stream_id
+        self.lock = threading.Lock()
+        self.conn = None
+        self.names = {}
+        self._connect()
+
+    def _connect(self):
+        self.conn = Client(self.address, authkey=self.authkey)
+        self.conn.send({'stream': self.stream_id})
+        self.names = self.conn.recv()['names']
+
+    def _request(self, message):
+        self.conn.send(message)
+        return self.conn.recv()
+
+    def ping(self):
+        """Health check: True jika server menjawab (sambung ulang sekali jika koneksi putus)"""
+        with self.lock:
+            try:
+                return self._request({'type': 'ping'})['ok']
+            except (EOFError, OSError):
+                pass
+            try:
+                self.close()
+                self._connect()
+                return self._request({'type': 'ping'})['ok']
+            except (EOFError, OSError):
+                return False
+
+    def detect_objects(self, frame, conf, imgsz, offset=(0, 0)):
+        """Kirim satu frame, return list deteksi dalam koordinat frame penuh"""
+        message = {'frame': frame, 'conf': conf, 'imgsz': imgsz}
+
+        with self.lock:
+            try:
+                reply = self._request(message)
+            except (EOFError, OSError):
+                # Server restart - sambung ulang sekali
+                self._connect()
+                reply = self._request(message)
+
+        if not reply['ok']:
+            raise RuntimeError(f"Inference server error: {reply['error']}")
+
+        offset_x, offset_y = offset
+        for detection in reply['detections']:
+            x1, y1, x2, y2 = detection['box']
+            detection['box'] = (x1 + offset_x, y1 + offset_y, x2 + offset_x, y2 + offset_y)
+        return reply['detections']
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+def main():
+    server_config = CONFIG['inference_server']
+    parser = argparse.ArgumentParser(description="Inference server YOLO untuk beberapa kiosk presensi")
+    parser.add_argument('--host', default=server_config['host'])
+    parser.add_argument('--port', type=int, default=server_config['port'])
+    parser.add_argument('--model', help="Default: model dari CONFIG (INT8 jika lolos gate)")
+    parser.add_argument('--max-batch', type=int, default=server_config['max_batch'])
+    parser.add_argument('--max-wait-ms', type=float, default=server_config['max_wait_ms'])
+    parser.add_argument('--report-interval', type=float, default=server_config['report_interval'])
+    args = parser.parse_args()
+
+    # Dicek sebelum model di-load: jangan pernah listen di jaringan tanpa key privat
+    try:
+        authkey = load_authkey(server_config, args.host)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ {e}")
+
+    model_path = args.model or select_model_path(CONFIG)
+    model = YOLO(model_path, task='detect')
+    print(f"✅ Model YOLO loaded: {model_path}")
+
+    server = InferenceServer(model, (args.host, args.port), authkey,
+                             args.max_batch, args.max_wait_ms, args.report_interval)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n=== INFERENCE SERVER DIHENTIKAN ===")
+
+if __name__ == "__main__":
+    main()
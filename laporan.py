@@ -0,0 +1,261 @@
+import argparse
+import csv
+import heapq
+import json
+import os
+
+from config import CONFIG
+
+# =============================
+# LAPORAN REKAP PRESENSI (STREAMING)
+# =============================
+#
+# Record dibaca satu per satu (JSON array besar atau JSON-lines dari log gerbang).
+# Seperti dashboard, hanya record terakhir per (card_id, tanggal) yang dihitung - tap
+# ulang di hari yang sama tidak menambah statistik. File presensi ditulis urut waktu,
+# jadi dedup cukup untuk tanggal yang sedang dibaca lalu di-flush ke statistik saat
+# tanggal berganti: memori sebanding jumlah siswa, bukan jumlah record atau hari.
+
+def iter_json_array(path, chunk_size=65536):
+    """Generator record dari file JSON array tanpa memuat seluruh file"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+
+    with open(path, 'r') as f:
+        while True:
+            if not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+
+            pos = 0
+            while True:
+                while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','
+                                             or (buffer[pos] == '[' and not started)):
+                    started = started or buffer[pos] == '['
+                    pos += 1
+                if pos >= len(buffer) or buffer[pos] == ']':
+                    break
+                try:
+                    record, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Record terpotong di batas chunk - baca lagi
+                    break
+                yield record
+
+            buffer = buffer[pos:]
+            if eof:
+                if buffer.strip() not in ('', ']'):
+                    raise ValueError(f"JSON tidak valid di akhir {path}")
+                return
+
+def iter_json_lines(path):
+    """Generator record dari file JSON-lines (log per gerbang)"""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def iter_file(path):
+    if path.endswith('.jsonl'):
+        return iter_json_lines(path)
+    return iter_json_array(path)
+
+def iter_records(paths):
+    for path in paths:
+        yield from iter_file(path)
+
+def record_time(record):
+    return (record.get('tanggal') or '', record.get('timestamp') or '')
+
+def iter_records_by_time(paths):
+    """Gabungkan beberapa file (masing-masing urut waktu) menjadi satu stream urut waktu"""
+    return heapq.merge(*(iter_file(path) for path in paths), key=record_time)
+
+def in_period(tanggal, args):
+    """Filter periode: --bulan YYYY-MM, --semester YYYY-1/2, atau --dari/--sampai"""
+    if not tanggal:
+        return False
+    if args.bulan and not tanggal.startswith(args.bulan):
+        return False
+    if args.semester:
+        # Semester 1 = Juli-Desember tahun itu, semester 2 = Januari-Juni tahun berikutnya
+        year, half = args.semester.split('-')
+        if half == '1':
+            start, end = f"{year}-07-01", f"{year}-12-31"
+        else:
+            start, end = f"{int(year) + 1}-01-01", f"{int(year) + 1}-06-30"
+        if not start <= tanggal <= end:
+            return False
+    if args.dari and tanggal < args.dari:
+        return False
+    if args.sampai and tanggal > args.sampai:
+        return False
+    return True
+
+def new_stats():
+    stats = {'total': 0, 'berhasil': 0, 'gagal': 0}
+    for obj in CONFIG['required_objects']:
+        stats[f"tanpa {obj}"] = 0
+    return stats
+
+def add_record(stats, record):
+    stats['total'] += 1
+    if record.get('status') == "BERHASIL":
+        stats['berhasil'] += 1
+    else:
+        stats['gagal'] += 1
+    for obj in record.get('atribut_tidak_terdeteksi', []):
+        key = f"tanpa {obj}"
+        if key in stats:
+            stats[key] += 1
+
+REPORT_FIELDS = ('card_id', 'nama', 'jurusan', 'angkatan', 'tanggal', 'timestamp', 'status',
+                 'atribut_tidak_terdeteksi')
+
+def build_report(records, args):
+    """Satu pass (record urut waktu): dedup per tanggal lalu statistik per siswa, jurusan, angkatan"""
+    students = {}
+    jurusan = {}
+    angkatan = {}
+    record_count = 0
+    student_days = 0
+    out_of_order = 0
+
+    # Hanya tanggal yang sedang dibaca: card_id -> record terakhir di tanggal itu
+    current_day = None
+    day_latest = {}
+
+    def flush(latest):
+        nonlocal student_days
+        for record in latest.values():
+            student_days += 1
+            card_id = record.get('card_id')
+            student = students.get(card_id)
+            if student is None:
+                student = students[card_id] = {
+                    'card_id': card_id,
+                    'nama': record.get('nama'),
+                    'jurusan': record.get('jurusan'),
+                    'angkatan': record.get('angkatan'),
+                    'pertama': record.get('tanggal'),
+                    'terakhir': record.get('tanggal'),
+                    **new_stats()
+                }
+            add_record(student, record)
+            student['pertama'] = min(student['pertama'], record.get('tanggal'))
+            student['terakhir'] = max(student['terakhir'], record.get('tanggal'))
+
+            add_record(jurusan.setdefault(record.get('jurusan'), {'jurusan': record.get('jurusan'), **new_stats()}), record)
+            add_record(angkatan.setdefault(record.get('angkatan'), {'angkatan': record.get('angkatan'), **new_stats()}), record)
+
+    for record in records:
+        tanggal = record.get('tanggal')
+        if not in_period(tanggal, args):
+            continue
+        record_count += 1
+        slim = {name: record[name] for name in REPORT_FIELDS if name in record}
+
+        if current_day is not None and tanggal < current_day:
+            # Tanggal ini sudah di-flush - dihitung sendiri (bisa dobel jika kartu sudah tap hari itu)
+            out_of_order += 1
+            flush({record.get('card_id'): slim})
+            continue
+
+        if tanggal != current_day:
+            flush(day_latest)
+            current_day = tanggal
+            day_latest = {}
+
+        current = day_latest.get(record.get('card_id'))
+        # Timestamp sama - record yang dibaca belakangan menang, sama dengan urutan file
+        if current is None or str(record.get('timestamp') or '') >= str(current.get('timestamp') or ''):
+            day_latest[record.get('card_id')] = slim
+    flush(day_latest)
+
+    if out_of_order:
+        print(f"⚠️ {out_of_order} record tidak urut tanggal, dihitung tanpa dedup")
+
+    def finish(rows):
+        for row in rows:
+            row['persen_lengkap'] = round(row['berhasil'] / row['total'] * 100, 1) if row['total'] else 0.0
+        return rows
+
+    return {
+        'records': record_count,
+        'siswa_hari': student_days,
+        'siswa': finish(sorted(students.values(), key=lambda row: (str(row['jurusan']), str(row['nama'])))),
+        'jurusan': finish(sorted(jurusan.values(), key=lambda row: str(row['jurusan']))),
+        'angkatan': finish(sorted(angkatan.values(), key=lambda row: str(row['angkatan'])))
+    }
+
+def write_csv(report, output):
+    paths = []
+    for section in ('siswa', 'jurusan', 'angkatan'):
+        rows = report[section]
+        if not rows:
+            continue
+        path = f"{output}_{section}.csv"
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+def write_json(report, output):
+    path = f"{output}.json"
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=4)
+    return [path]
+
+def write_xlsx(report, output):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise SystemExit("❌ Format xlsx butuh openpyxl (pip install openpyxl)")
+
+    # write_only: baris langsung di-stream ke file, tidak ditahan di memori
+    workbook = Workbook(write_only=True)
+    for section in ('siswa', 'jurusan', 'angkatan'):
+        rows = report[section]
+        sheet = workbook.create_sheet(section.capitalize())
+        if rows:
+            sheet.append(list(rows[0].keys()))
+            for row in rows:
+                sheet.append(list(row.values()))
+    path = f"{output}.xlsx"
+    workbook.save(path)
+    return [path]
+
+def main():
+    parser = argparse.ArgumentParser(description="Rekap presensi bulanan/semester (streaming)")
+    parser.add_argument('inputs', nargs='*', default=["presensi.json"],
+                        help="presensi.json dan/atau log gerbang *.jsonl")
+    parser.add_argument('--bulan', help="YYYY-MM")
+    parser.add_argument('--semester', help="YYYY-1 (Jul-Des) atau YYYY-2 (Jan-Jun tahun berikutnya)")
+    parser.add_argument('--dari', help="Tanggal awal YYYY-MM-DD")
+    parser.add_argument('--sampai', help="Tanggal akhir YYYY-MM-DD")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'json'], default='csv')
+    parser.add_argument('--output', default="laporan")
+    args = parser.parse_args()
+
+    missing = [path for path in args.inputs if not os.path.exists(path)]
+    if missing:
+        raise SystemExit(f"❌ File tidak ditemukan: {', '.join(missing)}")
+
+    report = build_report(iter_records_by_time(args.inputs), args)
+
+    writers = {'csv': write_csv, 'xlsx': write_xlsx, 'json': write_json}
+    paths = writers[args.format](report, args.output)
+
+    print(f"📊 {report['records']} record ({report['siswa_hari']} siswa-hari), {len(report['siswa'])} siswa, "
+          f"{len(report['jurusan'])} jurusan, {len(report['angkatan'])} angkatan")
+    for path in paths:
+        print(f"✅ Laporan disimpan ke {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import gc
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from config import CONFIG
+
+# =============================
+# PROFILING RESOURCE JANGKA PANJANG (DIAGNOSA LEAK)
+# =============================
+#
+# Satu sampel per sesi: RSS, file descriptor, thread, objek GC dan (opsional) alokasi
+# tracemalloc terbesar dibanding awal. Sampel ditulis sebagai JSON-lines ke log yang
+# dirotasi, dengan tren pertumbuhan per sesi (slope regresi linear) di setiap sampel.
+
+TREND_KEYS = ('rss_kb', 'fds', 'os_threads', 'threads', 'gc_objects', 'traced_kb')
+
+# Alokasi dari tracemalloc/importlib sendiri bukan leak aplikasi
+TRACEMALLOC_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+]
+
+def read_proc_status():
+    """VmRSS, VmHWM (peak RSS) dalam KB dan jumlah thread OS dari /proc (Linux/Raspberry Pi)"""
+    status = {}
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM', 'Threads'):
+                    status[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return status
+
+def fd_type(target):
+    if target.startswith('socket:'):
+        return 'socket'
+    if target.startswith('pipe:'):
+        return 'pipe'
+    if target.startswith('anon_inode:'):
+        return 'anon'
+    if target.startswith('/dev/'):
+        return 'device'
+    return 'file'
+
+def open_fds():
+    """Jumlah file descriptor terbuka per jenis (file, socket, pipe, device, anon)"""
+    fd_dir = '/proc/self/fd'
+    try:
+        names = os.listdir(fd_dir)
+    except OSError:
+        return None, {}
+
+    types = Counter()
+    for name in names:
+        try:
+            types[fd_type(os.readlink(os.path.join(fd_dir, name)))] += 1
+        except OSError:
+            # fd dari listdir sendiri sudah tertutup
+            continue
+    return sum(types.values()), dict(types)
+
+def thread_names():
+    """Thread Python per fungsi target - 'Thread-12 (rfid_listener)' dihitung sebagai rfid_listener"""
+    names = Counter()
+    for thread in threading.enumerate():
+        match = re.match(r"Thread-\d+ \((.+)\)$", thread.name)
+        names[match.group(1) if match else thread.name] += 1
+    return dict(names)
+
+def linear_slope(points):
+    """Slope regresi linear dari list (x, y)"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+def compute_trend(samples):
+    """Pertumbuhan per sesi untuk setiap metrik"""
+    trend = {}
+    for key in TREND_KEYS:
+        points = [(sample['session'], sample[key]) for sample in samples if sample.get(key) is not None]
+        if len(points) >= 2:
+            trend[key] = round(linear_slope(points), 3)
+    return trend
+
+class ResourceProfiler:
+    """Sampel resource per sesi ke log JSON-lines yang dirotasi"""
+
+    def __init__(self, log_file, max_mb=10, backup_count=5, use_tracemalloc=True, tracemalloc_frames=5,
+                 snapshot_every=10, top_n=10, trend_window=50):
+        self.log_file = log_file
+        self.use_tracemalloc = use_tracemalloc
+        self.tracemalloc_frames = tracemalloc_frames
+        self.snapshot_every = max(1, snapshot_every)
+        self.top_n = top_n
+        self.history = deque(maxlen=trend_window)
+        self.baseline = None
+        self.samples = 0
+
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.logger = logging.getLogger(f"slv.profiling.{os.path.abspath(log_file)}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(log_file, maxBytes=int(max_mb * 1024 * 1024), backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def start(self):
+        """Mulai tracemalloc dan ambil snapshot awal sebagai pembanding"""
+        if not self.use_tracemalloc:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+        self.baseline = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+        print(f"🩺 Profiling aktif (tracemalloc {self.tracemalloc_frames} frame), log: {self.log_file}")
+
+    def _top_allocations(self):
+        """Alokasi yang paling banyak bertambah sejak snapshot awal"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+        top = []
+        for stat in snapshot.compare_to(self.baseline, 'traceback')[:self.top_n]:
+            top.append({
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'count_diff': stat.count_diff,
+                'traceback': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+            })
+        return top
+
+    def sample(self, session, extra=None):
+        """Ambil satu sampel setelah sesi selesai, tulis ke log, return sampel"""
+        self.samples += 1
+        status = read_proc_status()
+        fds, fd_types = open_fds()
+
+        sample = {
+            'session': session,
+            'timestamp': datetime.now().isoformat(),
+            'rss_kb': status.get('VmRSS'),
+            'peak_rss_kb': status.get('VmHWM'),
+            'os_threads': status.get('Threads'),
+            'threads': threading.active_count(),
+            'thread_names': thread_names(),
+            'fds': fds,
+            'fd_types': fd_types,
+            'gc_objects': len(gc.get_objects())
+        }
+
+        if self.baseline is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            sample['traced_kb'] = current // 1024
+            sample['traced_peak_kb'] = peak // 1024
+            if self.samples % self.snapshot_every == 0:
+                sample['top_allocations'] = self._top_allocations()
+
+        if extra:
+            sample.update(extra)
+
+        self.history.append(sample)
+        sample['trend'] = compute_trend(self.history)
+
+        self.logger.info(json.dumps(sample))
+        return sample
+
+    def stop(self):
+        for handler in self.logger.handlers:
+            handler.close()
+        if self.baseline is not None:
+            tracemalloc.stop()
+            self.baseline = None
+
+# =============================
+# RINGKASAN LOG
+# =============================
+
+def read_log(log_file):
+    """Baca log beserta file rotasinya (.N paling lama dulu)"""
+    rotated = []
+    for path in glob.glob(f"{log_file}.*"):
+        suffix = path.rsplit('.', 1)[1]
+        if suffix.isdigit():
+            rotated.append((int(suffix), path))
+    paths = [path for _, path in sorted(rotated, reverse=True)]
+    if os.path.exists(log_file):
+        paths.append(log_file)
+
+    samples = []
+    for path in paths:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    samples.append(json.loads(line))
+    return samples
+
+def summarize(samples, warmup=0):
+    """Nilai awal/akhir dan tren per sesi, setelah sesi warmup dibuang"""
+    steady = [sample for sample in samples if sample['session'] > warmup]
+    if not steady:
+        return None
+
+    first, last = steady[0], steady[-1]
+    latest_top = next((sample['top_allocations'] for sample in reversed(steady)
+                       if sample.get('top_allocations')), [])
+    return {
+        'sessions': len(steady),
+        'first': {key: first.get(key) for key in TREND_KEYS},
+        'last': {key: last.get(key) for key in TREND_KEYS},
+        'trend': compute_trend(steady),
+        'thread_names': last.get('thread_names', {}),
+        'fd_types': last.get('fd_types', {}),
+        'top_allocations': latest_top
+    }
+
+def print_summary(summary):
+    print(f"\n🩺 RINGKASAN RESOURCE ({summary['sessions']} sesi)")
+    print(f"   {'metrik':<12} {'awal':>12} {'akhir':>12} {'tren/sesi':>12}")
+    for key in TREND_KEYS:
+        if summary['last'].get(key) is None:
+            continue
+        print(f"   {key:<12} {summary['first'][key]:>12} {summary['last'][key]:>12} "
+              f"{summary['trend'].get(key, 0.0):>12.3f}")
+    print(f"   Thread: {summary['thread_names']}")
+    print(f"   FD: {summary['fd_types']}")
+    if summary['top_allocations']:
+        print("   Alokasi bertambah terbesar:")
+        for stat in summary['top_allocations'][:5]:
+            print(f"   {stat['size_diff_kb']:>10.1f}KB {stat['count_diff']:>+8}  {stat['traceback'][0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ringkasan log profiling resource kiosk")
+    parser.add_argument('log_file', nargs='?', default=CONFIG['profiling']['log_file'])
+    parser.add_argument('--warmup', type=int, default=0, help="Abaikan N sesi pertama")
+    args = parser.parse_args()
+
+    summary = summarize(read_log(args.log_file), args.warmup)
+    if summary is None:
+        raise SystemExit(f"❌ Tidak ada sampel di {args.log_file}")
+    print_summary(summary)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+
+import cv2
+import yaml
+from ultralytics import YOLO
+
+from config import CONFIG
+
+# =============================
+# INT8 QUANTIZATION DENGAN KALIBRASI DARI SESI KIOSK
+# =============================
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+
+def collect_calibration_frames(sources, output_dir, every=10, max_frames=500, camera_index=None):
+    """Kumpulkan frame kalibrasi dari rekaman sesi, folder gambar/evidence, atau kamera live"""
+    os.makedirs(output_dir, exist_ok=True)
+    saved = 0
+
+    def save(frame):
+        nonlocal saved
+        frame = cv2.resize(frame, (640, 480))
+        cv2.imwrite(os.path.join(output_dir, f"calib_{saved:05d}.jpg"), frame)
+        saved += 1
+
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, '**', '*'), recursive=True)))
+        else:
+            paths.append(source)
+
+    for path in paths:
+        if saved >= max_frames:
+            break
+
+        lower = path.lower()
+        if lower.endswith(IMAGE_EXTENSIONS):
+            # Folder evidence juga berisi crop per class, kalibrasi cukup pakai frame penuh
+            if os.path.basename(lower).startswith('crop_'):
+                continue
+            frame = cv2.imread(path)
+            if frame is not None:
+                save(frame)
+        elif lower.endswith(VIDEO_EXTENSIONS):
+            cap = cv2.VideoCapture(path)
+            index = 0
+            while saved < max_frames:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if index % every == 0:
+                    save(frame)
+                index += 1
+            cap.release()
+
+    if camera_index is not None:
+        cam = cv2.VideoCapture(camera_index)
+        index = 0
+        while saved < max_frames and cam.isOpened():
+            ret, frame = cam.read()
+            if not ret:
+                break
+            if index % every == 0:
+                save(frame)
+            index += 1
+        cam.release()
+
+    print(f"✅ {saved} frame kalibrasi disimpan ke {output_dir}")
+    return saved
+
+def write_calibration_yaml(image_dir, names, path):
+    """Dataset yaml untuk kalibrasi INT8 (ultralytics membaca split 'val')"""
+    data = {
+        'path': os.path.abspath(image_dir),
+        'train': '.',
+        'val': '.',
+        'names': names
+    }
+    with open(path, 'w') as f:
+        yaml.safe_dump(data, f)
+    return path
+
+def export_int8(model_path, calibration_yaml, export_format='openvino', imgsz=640, dynamic=True):
+    """Export model ke runtime CPU dengan quantization INT8 (dynamic = input bisa semua level adaptive)"""
+    print(f"⚙️  Export INT8 ({export_format}, {'dynamic' if dynamic else 'static'} {imgsz}) dari {model_path}...")
+    model = YOLO(model_path)
+    exported = model.export(format=export_format, int8=True, data=calibration_yaml, imgsz=imgsz, dynamic=dynamic)
+    print(f"✅ Model INT8: {exported}")
+    return exported
+
+def evaluate(model_path, val_data, imgsz=640):
+    """mAP dan recall per class wajib pada dataset validasi berlabel"""
+    model = YOLO(model_path, task='detect')
+    metrics = model.val(data=val_data, imgsz=imgsz, verbose=False, plots=False)
+
+    recalls = {}
+    for i, class_id in enumerate(metrics.box.ap_class_index):
+        class_name = metrics.names[int(class_id)]
+        if class_name in CONFIG['required_objects']:
+            precision, recall, ap50, ap = metrics.box.class_result(i)
+            recalls[class_name] = float(recall)
+
+    return {
+        'map50': float(metrics.box.map50),
+        'map50_95': float(metrics.box.map),
+        'recall': recalls
+    }
+
+def benchmark(model_path, image_dir, imgsz=640, max_images=50, warmup=3):
+    """Median latency inferensi (ms) pada frame kalibrasi"""
+    model = YOLO(model_path, task='detect')
+    images = sorted(glob.glob(os.path.join(image_dir, '*.jpg')))[:max_images]
+    frames = [cv2.imread(path) for path in images]
+
+    for frame in frames[:warmup]:
+        model(frame, imgsz=imgsz, verbose=False)
+
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        model(frame, imgsz=imgsz, verbose=False)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings) if timings else 0.0
+
+def check_gate(float_metrics, int8_metrics, gate):
+    """Bandingkan model INT8 dengan float, return (lolos, daftar alasan gagal)"""
+    failures = []
+
+    map_drop = float_metrics['map50_95'] - int8_metrics['map50_95']
+    if map_drop > gate['max_map_drop']:
+        failures.append(f"mAP50-95 turun {map_drop:.3f} (maks {gate['max_map_drop']})")
+
+    for class_name in CONFIG['required_objects']:
+        float_recall = float_metrics['recall'].get(class_name)
+        int8_recall = int8_metrics['recall'].get(class_name)
+        if float_recall is None or int8_recall is None:
+            failures.append(f"recall {class_name} tidak tersedia di dataset validasi")
+            continue
+        recall_drop = float_recall - int8_recall
+        if recall_drop > gate['max_recall_drop']:
+            failures.append(f"recall {class_name} turun {recall_drop:.3f} (maks {gate['max_recall_drop']})")
+
+    return len(failures) == 0, failures
+
+def adaptive_imgsz(config):
+    """Semua imgsz yang bisa dipilih AdaptiveInferenceController, terbesar dulu"""
+    return sorted({level['imgsz'] for level in config['adaptive_inference']['levels']}, reverse=True)
+
+def validate_level(float_path, int8_path, val_data, calib_dir, imgsz, gate):
+    """Akurasi dan latency float vs INT8 di satu imgsz, level yang error dianggap tidak lolos"""
+    print(f"📊 Validasi float vs INT8 di imgsz {imgsz}...")
+    try:
+        float_metrics = evaluate(float_path, val_data, imgsz)
+        int8_metrics = evaluate(int8_path, val_data, imgsz)
+        float_ms = benchmark(float_path, calib_dir, imgsz)
+        int8_ms = benchmark(int8_path, calib_dir, imgsz)
+    except Exception as e:
+        # Model static tidak bisa menerima imgsz lain - level ini tidak boleh memakai INT8
+        return {'passed': False, 'failures': [f"imgsz {imgsz} gagal dijalankan: {e}"]}
+
+    passed, failures = check_gate(float_metrics, int8_metrics, gate)
+    return {
+        'float': float_metrics,
+        'int8': int8_metrics,
+        'float_latency_ms': round(float_ms, 2),
+        'int8_latency_ms': round(int8_ms, 2),
+        'speedup': round(float_ms / int8_ms, 3) if int8_ms > 0 else 0.0,
+        'passed': passed,
+        'failures': failures
+    }
+
+def print_level(imgsz, result):
+    print(f"\n📐 imgsz {imgsz}")
+    if 'float' not in result:
+        print(f"   ❌ {result['failures'][0]}")
+        return
+    float_metrics, int8_metrics = result['float'], result['int8']
+    print(f"{'':<16} {'float':>8} {'int8':>8}")
+    print(f"{'mAP50':<16} {float_metrics['map50']:>8.3f} {int8_metrics['map50']:>8.3f}")
+    print(f"{'mAP50-95':<16} {float_metrics['map50_95']:>8.3f} {int8_metrics['map50_95']:>8.3f}")
+    for class_name in CONFIG['required_objects']:
+        print(f"{'R ' + class_name:<16} {float_metrics['recall'].get(class_name, 0):>8.3f} "
+              f"{int8_metrics['recall'].get(class_name, 0):>8.3f}")
+    print(f"{'latency (ms)':<16} {result['float_latency_ms']:>8.1f} {result['int8_latency_ms']:>8.1f}")
+    print(f"⚡ Speedup: {result['speedup']:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantization INT8 best.pt dengan kalibrasi dari sesi kiosk")
+    parser.add_argument('--sources', nargs='*', default=[],
+                        help="Rekaman sesi (video) atau folder gambar/evidence untuk kalibrasi")
+    parser.add_argument('--camera', type=int, help="Ambil frame kalibrasi dari kamera live (index)")
+    parser.add_argument('--val-data', required=True, help="Dataset yaml berlabel untuk validasi mAP/recall")
+    parser.add_argument('--model', default=CONFIG['model_path'])
+    parser.add_argument('--format', default='openvino', help="Format export INT8 (openvino, onnx, tflite, ...)")
+    parser.add_argument('--calib-dir', default="calibration/images")
+    parser.add_argument('--every', type=int, default=10, help="Ambil 1 dari N frame video")
+    parser.add_argument('--max-frames', type=int, default=500)
+    parser.add_argument('--levels', type=int, nargs='+', default=adaptive_imgsz(CONFIG),
+                        help="imgsz yang divalidasi (default: semua level adaptive_inference)")
+    parser.add_argument('--static', action='store_true',
+                        help="Export input statis (format tanpa dukungan dynamic), tetap divalidasi di semua level")
+    parser.add_argument('--report', default=CONFIG['quantization_report'])
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+
+    # STEP 1: Frame kalibrasi
+    count = collect_calibration_frames(args.sources, args.calib_dir, args.every, args.max_frames, args.camera)
+    if count == 0:
+        print("❌ Tidak ada frame kalibrasi. Program dihentikan.")
+        return
+    calibration_yaml = write_calibration_yaml(args.calib_dir, model.names,
+                                              os.path.join(os.path.dirname(args.calib_dir), "calibration.yaml"))
+
+    # STEP 2: Export INT8 - dynamic supaya satu model melayani semua level adaptive
+    levels = sorted(set(args.levels), reverse=True)
+    int8_path = export_int8(args.model, calibration_yaml, args.format, levels[0], dynamic=not args.static)
+
+    # STEP 3: Validasi akurasi dan kecepatan di setiap imgsz yang bisa dipilih controller
+    results = {}
+    for imgsz in levels:
+        results[str(imgsz)] = validate_level(args.model, int8_path, args.val_data, args.calib_dir, imgsz,
+                                             CONFIG['quantization_gate'])
+        print_level(imgsz, results[str(imgsz)])
+
+    failures = [f"imgsz {imgsz}: {failure}" for imgsz, result in results.items() for failure in result['failures']]
+    passed = not failures
+
+    if passed:
+        print("\n✅ INT8 lolos accuracy gate di semua level - set CONFIG['use_quantized_model'] = True untuk memakainya")
+    else:
+        print("\n❌ INT8 tidak lolos accuracy gate:")
+        for failure in failures:
+            print(f"   - {failure}")
+
+    report = {
+        'float_model': args.model,
+        'int8_model': str(int8_path),
+        'format': args.format,
+        'dynamic': not args.static,
+        'calibration_frames': count,
+        'levels': results,
+        'speedup': results[str(levels[0])].get('speedup', 0.0),
+        'gate': CONFIG['quantization_gate'],
+        'passed': passed,
+        'failures': failures,
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"📝 Report disimpan ke {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+import cv2
+from ultralytics import YOLO
+
+from config import CONFIG
+from deteksi import SimpleDetectionManager, crop_roi, extract_detections
+
+# =============================
+# REPLAY REKAMAN SESI & TUNING THRESHOLD
+# =============================
+#
+# Tahap 1 (mahal, sekali saja): setiap frame rekaman dijalankan ke YOLO dengan confidence
+# rendah, hasilnya di-cache per frame. Tahap 2 (murah, bisa diulang): setiap kombinasi
+# confidence_threshold / min_confidence / detection_duration diputar ulang dari cache
+# melalui SimpleDetectionManager yang sama dengan kiosk. Kiosk tidak menginferensi setiap
+# frame kamera (gate, stride, tracker), jadi frame cache di-subsample ke fps inferensi
+# kiosk yang diukur sebelum diputar ulang.
+
+CACHE_CONF = 0.1  # Harus <= confidence_threshold terendah yang di-sweep
+
+worker_model = None
+worker_sessions = None
+
+def file_key(path):
+    """Path + ukuran + mtime - file yang diganti di tempat (mis. best.pt hasil retrain) = cache baru"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime}"
+
+def cache_path(cache_dir, video_path, model_path, setting):
+    """Nama cache unik per video, model dan level inferensi (imgsz/roi)"""
+    key = f"{file_key(video_path)}|{file_key(model_path)}|{setting['imgsz']}|{setting['roi']}|{CACHE_CONF}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+def init_inference_worker(model_path):
+    global worker_model
+    worker_model = YOLO(model_path, task='detect')
+
+def infer_video(job):
+    """Jalankan YOLO pada semua frame satu video, simpan deteksi per frame ke cache"""
+    video_path, path, setting = job
+    if os.path.exists(path):
+        return video_path, path, False
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    frames = []
+    index = 0
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        # Sama seperti safe_camera_read di kiosk
+        frame = cv2.resize(frame, (640, 480))
+        # Level yang sama dengan DetectionPipeline.detect di kiosk
+        roi_frame, offset = crop_roi(frame, setting['roi'])
+        results = worker_model(roi_frame, conf=CACHE_CONF, verbose=False, imgsz=setting['imgsz'])
+        detections = extract_detections(results, worker_model.names, CONFIG['required_objects'], offset)
+        frames.append({
+            't': index / fps,
+            'detections': [{'class_name': d['class_name'], 'confidence': d['confidence']} for d in detections]
+        })
+        index += 1
+    cap.release()
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'video': video_path, 'fps': fps, 'setting': setting, 'frames': frames}, f)
+    os.replace(tmp_path, path)
+    return video_path, path, True
+
+def subsample_frames(frames, kiosk_fps):
+    """Ambil frame cache dengan laju inferensi kiosk (frame detector per detik)"""
+    interval = 1.0 / kiosk_fps
+    selected = []
+    next_t = 0.0
+    for frame in frames:
+        if frame['t'] + 1e-6 >= next_t:
+            selected.append(frame)
+            next_t += interval
+            # Video lebih lambat dari kiosk - jangan menumpuk frame yang tertinggal
+            next_t = max(next_t, frame['t'] + interval / 2)
+    return selected
+
+def replay_session(frames, confidence_threshold, min_confidence, duration):
+    """Putar ulang satu sesi dari cache, return (hasil, waktu keputusan)"""
+    manager = SimpleDetectionManager(CONFIG['required_objects'], min_confidence)
+    decision_time = duration
+
+    for frame in frames:
+        if frame['t'] >= duration:
+            break
+        # Filter conf sama dengan argumen conf= pada model(...) di kiosk
+        detections = [d for d in frame['detections'] if d['confidence'] >= confidence_threshold]
+        manager.update_detections(detections)
+        if len(manager.detected_objects) == len(CONFIG['required_objects']):
+            # Semua atribut sudah terlihat - keputusan BERHASIL tidak akan berubah lagi
+            decision_time = frame['t']
+            break
+
+    return manager.get_results(), decision_time
+
+def init_sweep_worker(sessions):
+    global worker_sessions
+    worker_sessions = sessions
+
+def evaluate_params(params):
+    """Akurasi dan waktu keputusan satu kombinasi parameter pada semua sesi berlabel"""
+    confidence_threshold, min_confidence, duration = params
+    correct = false_fail = false_pass = 0
+    total_time = 0.0
+
+    for session in worker_sessions:
+        results, decision_time = replay_session(session['frames'], confidence_threshold, min_confidence, duration)
+        expected = session['expected_success']
+
+        if results['success'] == expected:
+            correct += 1
+        elif expected:
+            false_fail += 1
+        else:
+            false_pass += 1
+        total_time += decision_time
+
+    count = len(worker_sessions)
+    return {
+        'confidence_threshold': confidence_threshold,
+        'min_confidence': min_confidence,
+        'detection_duration': duration,
+        'accuracy': correct / count,
+        'false_gagal': false_fail,
+        'false_berhasil': false_pass,
+        'avg_decision_time': total_time / count
+    }
+
+def parse_list(text, cast=float):
+    return [cast(value) for value in text.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay rekaman sesi dan sweep threshold deteksi")
+    parser.add_argument('labels', help="JSON: [{\"video\": \"a.mp4\", \"present\": [\"NAME TAG\", ...]}, ...]")
+    parser.add_argument('--model', default=CONFIG['model_path'])
+    parser.add_argument('--cache-dir', default="replay_cache")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--conf', default="0.25,0.3,0.35,0.4,0.5", help="Daftar confidence_threshold")
+    parser.add_argument('--min-conf', default="0.4,0.5,0.6,0.7", help="Daftar min_confidence")
+    parser.add_argument('--duration', default="3,4,5,6", help="Daftar detection_duration (detik)")
+    parser.add_argument('--kiosk-fps', type=float, required=True,
+                        help="Frame yang diinferensi kiosk per detik (log kiosk: Frames inferred / detection_duration)")
+    parser.add_argument('--level', type=int, default=0,
+                        help="Index level adaptive_inference (imgsz/roi) yang diputar ulang, 0 = level penuh")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--csv', help="Simpan semua hasil sweep ke CSV")
+    args = parser.parse_args()
+    if args.kiosk_fps <= 0:
+        raise SystemExit("❌ --kiosk-fps harus > 0")
+    levels = CONFIG['adaptive_inference']['levels']
+    if not 0 <= args.level < len(levels):
+        raise SystemExit(f"❌ --level harus 0-{len(levels) - 1}")
+    setting = {'imgsz': levels[args.level]['imgsz'], 'roi': levels[args.level]['roi']}
+
+    conf_values = parse_list(args.conf)
+    too_low = [value for value in conf_values if value < CACHE_CONF]
+    if too_low:
+        raise SystemExit(f"❌ --conf {too_low} di bawah CACHE_CONF {CACHE_CONF}: deteksi di bawahnya tidak ada di cache")
+
+    with open(args.labels, 'r') as f:
+        labels = json.load(f)
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+
+    # TAHAP 1: inferensi paralel per video (dilewati jika cache sudah ada)
+    jobs = [(label['video'], cache_path(args.cache_dir, label['video'], args.model, setting), setting)
+            for label in labels]
+    cache_files = {}
+    with Pool(args.workers, initializer=init_inference_worker, initargs=(args.model,)) as pool:
+        for video_path, path, computed in pool.imap_unordered(infer_video, jobs):
+            cache_files[video_path] = path
+            print(f"{'🧠 Inferensi' if computed else '📦 Cache'}: {video_path}")
+
+    sessions = []
+    for label in labels:
+        with open(cache_files[label['video']], 'r') as f:
+            cached = json.load(f)
+        if args.kiosk_fps > cached['fps']:
+            print(f"⚠️ {label['video']}: {cached['fps']:.1f} fps lebih rendah dari kiosk, semua frame dipakai")
+        # Tracker hanya meneruskan box detector dengan confidence yang meluruh, jadi tidak
+        # menambah atribut baru - keputusan cukup diputar ulang dari frame detector
+        sessions.append({
+            'frames': subsample_frames(cached['frames'], args.kiosk_fps),
+            'expected_success': all(obj in label['present'] for obj in CONFIG['required_objects'])
+        })
+
+    # TAHAP 2: sweep parameter keputusan dari cache
+    grid = list(itertools.product(conf_values, parse_list(args.min_conf), parse_list(args.duration)))
+    print(f"\n🔁 Sweep {len(grid)} kombinasi pada {len(sessions)} sesi ({args.kiosk_fps:g} frame inferensi/detik, "
+          f"level {args.level}: imgsz {setting['imgsz']}, roi {setting['roi']})...")
+    with Pool(args.workers, initializer=init_sweep_worker, initargs=(sessions,)) as pool:
+        rows = pool.map(evaluate_params, grid)
+
+    rows.sort(key=lambda row: (-row['accuracy'], row['avg_decision_time']))
+
+    print(f"ℹ️  Hasil hanya berlaku untuk level {args.level} - kiosk yang sering turun level perlu sweep di level itu juga")
+    current = (CONFIG['confidence_threshold'], CONFIG['min_confidence'], CONFIG['detection_duration'])
+    print(f"\n{'conf':>6} {'min_conf':>8} {'durasi':>6} {'akurasi':>8} {'false GAGAL':>11} "
+          f"{'false BERHASIL':>14} {'waktu (s)':>9}")
+    for row in rows[:args.top]:
+        marker = " ← CONFIG" if (row['confidence_threshold'], row['min_confidence'],
+                                  row['detection_duration']) == current else ""
+        print(f"{row['confidence_threshold']:>6.2f} {row['min_confidence']:>8.2f} {row['detection_duration']:>6.1f} "
+              f"{row['accuracy'] * 100:>7.1f}% {row['false_gagal']:>11} {row['false_berhasil']:>14} "
+              f"{row['avg_decision_time']:>9.2f}{marker}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"✅ Hasil sweep disimpan ke {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import csv
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import Counter
+
+from config import CONFIG
+from laporan import iter_records
+
+# =============================
+# ROSTER KARTU & PAYLOAD BERTANDA TANGAN
+# =============================
+#
+# Roster (CSV card_id,nama,jurusan,angkatan) adalah sumber data siswa yang kanonik -
+# teks di kartu hanya dipakai jika roster belum ada. Payload kartu boleh ditandatangani:
+# "<nama,jurusan,angkatan>|<hmac>" (atau "|<hmac>" saja), HMAC-SHA256 dari card_id dan isi
+# kartu, jadi teks yang disalin ke kartu lain tidak akan lolos.
+
+ROSTER_FIELDS = ['card_id', 'nama', 'jurusan', 'angkatan']
+
+def sign_card_payload(card_id, body, secret, length=16):
+    """Signature hex (dipotong) untuk isi kartu, terikat ke UID kartu"""
+    message = f"{card_id}|{body}".encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()[:length]
+
+def build_card_payload(card_id, body, secret, length=16):
+    return f"{body}|{sign_card_payload(card_id, body, secret, length)}"
+
+def verify_card_signature(card_id, text, secret=None, require_signature=False, length=16):
+    """Cek signature payload kartu, return isi kartu tanpa signature. ValueError jika ditolak"""
+    # SimpleMFRC522 mengisi sisa blok dengan spasi/NUL
+    text = (text or '').replace('\x00', '').strip()
+    body, separator, signature = text.rpartition('|')
+
+    if separator:
+        if secret:
+            expected = sign_card_payload(card_id, body, secret, length)
+            if not hmac.compare_digest(signature.strip().lower(), expected):
+                raise ValueError("signature kartu tidak cocok")
+        return body
+
+    if require_signature:
+        raise ValueError("kartu tanpa signature")
+    return text
+
+def parse_card_fields(body):
+    """Field kartu [nama, jurusan, angkatan] atau [] untuk kartu signature saja, ValueError jika format salah"""
+    fields = [field.strip() for field in body.split(',')] if body else []
+    if len(fields) not in (0, 3):
+        raise ValueError(f"format data kartu salah: {body}")
+    return fields
+
+def load_roster(path):
+    """Baca roster CSV menjadi dict card_id -> data siswa"""
+    students = {}
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        missing = set(ROSTER_FIELDS) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"kolom roster tidak ada: {', '.join(sorted(missing))}")
+
+        for line, row in enumerate(reader, start=2):
+            card_id = (row['card_id'] or '').strip()
+            if not card_id:
+                continue
+            if card_id in students:
+                print(f"⚠️ card_id {card_id} dobel di roster (baris {line}), dipakai yang pertama")
+                continue
+            students[card_id] = {name: (row[name] or '').strip() for name in ROSTER_FIELDS}
+    return students
+
+class RosterCache:
+    """Index roster di memori (lookup O(1)), reload otomatis jika file roster berubah"""
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.students = {}
+        self.file_key = None
+        self.last_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def is_loaded(self):
+        return self.file_key is not None
+
+    def refresh(self, force=False):
+        """Cek mtime/size paling sering tiap check_interval, muat ulang jika berubah"""
+        now = time.time()
+        if not force and now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # File hilang/sedang diganti - tetap pakai roster terakhir
+            return
+
+        file_key = (stat.st_mtime_ns, stat.st_size)
+        if file_key == self.file_key:
+            return
+
+        try:
+            students = load_roster(self.path)
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"❌ Roster gagal dimuat, tetap pakai data lama: {e}")
+            return
+
+        with self.lock:
+            self.students = students
+            self.file_key = file_key
+            self.reloads += 1
+        print(f"📇 Roster dimuat: {len(students)} kartu dari {self.path}")
+
+    def lookup(self, card_id):
+        """Data kanonik siswa untuk card_id, None jika tidak terdaftar"""
+        self.refresh()
+        with self.lock:
+            student = self.students.get(str(card_id))
+            if student is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return student
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.students),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'reloads': self.reloads
+            }
+
+# =============================
+# BUAT ROSTER AWAL DARI DATA PRESENSI
+# =============================
+
+def build_roster(records):
+    """Satu baris per card_id: kombinasi nama/jurusan/angkatan yang paling sering muncul"""
+    variants = {}
+    for record in records:
+        card_id = record.get('card_id')
+        if not card_id:
+            continue
+        key = tuple(str(record.get(name) or '').strip() for name in ROSTER_FIELDS[1:])
+        variants.setdefault(str(card_id), Counter())[key] += 1
+
+    rows = []
+    conflicts = 0
+    for card_id, counter in variants.items():
+        if len(counter) > 1:
+            conflicts += 1
+        nama, jurusan, angkatan = counter.most_common(1)[0][0]
+        rows.append({'card_id': card_id, 'nama': nama, 'jurusan': jurusan, 'angkatan': angkatan})
+
+    rows.sort(key=lambda row: (row['jurusan'], row['nama']))
+    return rows, conflicts
+
+def write_roster(rows, output):
+    tmp_path = output + ".tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=ROSTER_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    # Atomic - kiosk yang sedang jalan tidak pernah membaca roster setengah jadi
+    os.replace(tmp_path, output)
+
+def main():
+    roster_config = CONFIG['roster']
+    parser = argparse.ArgumentParser(description="Roster kartu presensi dan payload kartu bertanda tangan")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Buat roster dari presensi.json / log *.jsonl")
+    build_parser.add_argument('inputs', nargs='*', default=["presensi.json"])
+    build_parser.add_argument('--output', default=roster_config['path'])
+    build_parser.add_argument('--force', action='store_true', help="Timpa roster yang sudah ada")
+
+    sign_parser = subparsers.add_parser('sign', help="Buat payload kartu bertanda tangan")
+    sign_parser.add_argument('card_id', nargs='?', help="UID kartu (tidak perlu jika --write)")
+    sign_parser.add_argument('--data', default='', help="\"nama,jurusan,angkatan\" (kosong = data dari roster)")
+    sign_parser.add_argument('--write', action='store_true', help="Tulis langsung ke kartu dengan MFRC522")
+
+    check_parser = subparsers.add_parser('check', help="Validasi roster dan cari kartu")
+    check_parser.add_argument('card_ids', nargs='*')
+    check_parser.add_argument('--roster', default=roster_config['path'])
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if os.path.exists(args.output) and not args.force:
+            raise SystemExit(f"❌ {args.output} sudah ada (pakai --force untuk menimpa)")
+        rows, conflicts = build_roster(iter_records(args.inputs))
+        write_roster(rows, args.output)
+        print(f"✅ {len(rows)} kartu ditulis ke {args.output} ({conflicts} kartu punya data berbeda-beda, cek manual)")
+
+    elif args.command == 'sign':
+        if not roster_config['secret']:
+            raise SystemExit("❌ CONFIG['roster']['secret'] belum di-set")
+
+        reader = None
+        card_id = args.card_id
+        if args.write:
+            from mfrc522 import SimpleMFRC522
+            reader = SimpleMFRC522()
+            print("📇 Tempelkan kartu...")
+            card_id = reader.read_id()
+        if card_id is None:
+            raise SystemExit("❌ card_id wajib diisi jika tidak memakai --write")
+
+        payload = build_card_payload(str(card_id), args.data, roster_config['secret'],
+                                     roster_config['signature_length'])
+        if len(payload) > 48:
+            raise SystemExit(f"❌ Payload {len(payload)} karakter, maksimal 48 untuk MFRC522: {payload}")
+
+        if reader is not None:
+            reader.write(payload)
+            print(f"✅ Kartu {card_id} ditulis: {payload}")
+        else:
+            print(payload)
+
+    else:
+        cache = RosterCache(args.roster)
+        if not cache.is_loaded():
+            raise SystemExit(f"❌ Roster {args.roster} tidak bisa dimuat")
+        for card_id in args.card_ids:
+            student = cache.lookup(card_id)
+            print(f"{'✅' if student else '❌'} {card_id}: {student or 'tidak terdaftar'}")
+        print(f"📊 {cache.get_stats()}")
+
+if __name__ == "__main__":
+    main()
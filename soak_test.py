@@ -0,0 +1,195 @@
+import argparse
+import glob
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from config import CONFIG
+from profiling import print_summary, read_log, summarize
+from roster import build_card_payload, write_roster
+
+# =============================
+# SOAK TEST - RIBUAN SESI SIMULASI DENGAN PROFILING RESOURCE
+# =============================
+#
+# Menjalankan run_session() dari tes.py apa adanya (window, video, audio, thread, model),
+# hanya kartu RFID yang disimulasikan dan kamera bisa diganti file video. Presensi, roster
+# dan evidence ditulis ke folder sementara. Dijalankan di kiosk/Raspberry Pi (butuh library
+# hardware yang sama dengan tes.py).
+
+JURUSAN = ['Mekatronika', 'Pemesinan', 'Ototronik', 'Animasi']
+
+def make_roster(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'card_id': str(800000000000 + i),
+        'nama': f"Siswa {i}",
+        'jurusan': rng.choice(JURUSAN),
+        'angkatan': str(rng.choice([2023, 2024, 2025]))
+    } for i in range(count)]
+
+def card_text(card_id, student):
+    body = f"{student['nama']},{student['jurusan']},{student['angkatan']}"
+    secret = CONFIG['roster']['secret']
+    if secret:
+        return build_card_payload(card_id, body, secret, CONFIG['roster']['signature_length'])
+    return body
+
+class SimulatedReader:
+    """Pengganti SimpleMFRC522: kartu 'ditempel' setelah jeda acak"""
+
+    def __init__(self, students, repeat_ratio=0.2, unknown_ratio=0.05, min_wait=0.5, max_wait=2.0, seed=0):
+        self.rng = random.Random(seed)
+        self.students = students
+        self.repeat_ratio = repeat_ratio
+        self.unknown_ratio = unknown_ratio
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.used_cards = []
+        self.unknown_taps = 0
+        self.next_tap = None
+
+    def new_card(self):
+        student = self.students[len(self.used_cards) % len(self.students)]
+        card = (int(student['card_id']), card_text(student['card_id'], student))
+        self.used_cards.append(card)
+        return card
+
+    def _tap(self):
+        # Kartu di luar roster - harus ditolak sebelum kamera bekerja
+        if self.rng.random() < self.unknown_ratio:
+            self.unknown_taps += 1
+            card_id = 900000000000 + self.unknown_taps
+            return card_id, card_text(card_id, {'nama': "Tidak Dikenal", 'jurusan': "-", 'angkatan': "-"})
+        # Sebagian tap memakai kartu lama supaya jalur "sudah tap hari ini" ikut teruji
+        if self.used_cards and self.rng.random() < self.repeat_ratio:
+            return self.rng.choice(self.used_cards)
+        return self.new_card()
+
+    def read(self):
+        time.sleep(self.rng.uniform(self.min_wait, self.max_wait))
+        return self._tap()
+
+    def read_no_block(self):
+        """Seperti SimpleMFRC522.read_no_block: (None, None) jika belum ada kartu"""
+        now = time.time()
+        if self.next_tap is None:
+            self.next_tap = now + self.rng.uniform(self.min_wait, self.max_wait)
+        if now < self.next_tap:
+            return None, None
+        self.next_tap = None
+        return self._tap()
+
+class LoopingCapture:
+    """File video sebagai pengganti kamera - diputar ulang terus dengan fps kamera"""
+
+    def __init__(self, path, fps=25):
+        self.cap = cv2.VideoCapture(path)
+        self.frame_interval = 1.0 / fps
+        self.last_read = 0.0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        wait = self.last_read + self.frame_interval - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_read = time.time()
+
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test kiosk presensi dengan profiling resource")
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--video', help="File video pengganti kamera (default: kamera asli)")
+    parser.add_argument('--duration', type=float, default=CONFIG['detection_duration'],
+                        help="Durasi deteksi per sesi (detik)")
+    parser.add_argument('--repeat-ratio', type=float, default=0.2, help="Porsi tap kartu yang sudah tap")
+    parser.add_argument('--unknown-ratio', type=float, default=0.05, help="Porsi tap kartu di luar roster")
+    parser.add_argument('--cards', type=int, default=5000, help="Jumlah kartu di roster simulasi")
+    parser.add_argument('--warmup', type=int, default=20, help="Sesi awal yang tidak dihitung di tren")
+    parser.add_argument('--log-file', default="profiling/soak_log.jsonl")
+    parser.add_argument('--max-rss-kb', type=float, default=50.0, help="Batas tren RSS per sesi")
+    parser.add_argument('--max-fd', type=float, default=0.02, help="Batas tren fd per sesi")
+    parser.add_argument('--max-threads', type=float, default=0.02, help="Batas tren thread per sesi")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="soak_")
+    # Log lama (termasuk file rotasi) dihapus supaya ringkasan hanya berisi run ini
+    for path in [args.log_file] + glob.glob(f"{args.log_file}.*"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    # CONFIG harus diubah sebelum tes di-import - profiler, pipeline dan writer dibuat saat import
+    CONFIG['detection_duration'] = args.duration
+    CONFIG['multi_gate']['enabled'] = False
+    CONFIG['evidence']['dir'] = os.path.join(work_dir, "evidence")
+    CONFIG['roster'].update({'enabled': True, 'path': os.path.join(work_dir, "roster.csv")})
+    CONFIG['profiling'].update({'enabled': True, 'log_file': args.log_file})
+
+    students = make_roster(args.cards, args.seed)
+    write_roster(students, CONFIG['roster']['path'])
+
+    import tes
+
+    tes.JSON_FILE = os.path.join(work_dir, "presensi.json")
+    tes.reader = SimulatedReader(students, args.repeat_ratio, args.unknown_ratio, seed=args.seed)
+
+    tes.model = tes.load_yolov11_model()
+    if tes.model is None:
+        raise SystemExit("❌ Gagal load model YOLO")
+    tes.detection_pipeline = tes.DetectionPipeline(tes.model, CONFIG, tes.detection_manager, tes.frame_gate,
+                                                   tes.inference_controller, tes.attribute_tracker)
+
+    tes.camera = LoopingCapture(args.video) if args.video else tes.initialize_camera_direct()
+    if tes.camera is None or not tes.camera.isOpened():
+        raise SystemExit("❌ Kamera / video tidak bisa dibuka")
+
+    print(f"🧪 Soak test {args.sessions} sesi ({work_dir})")
+    start = time.time()
+    try:
+        # Loop yang sama dengan tes.main()
+        for session_count in range(1, args.sessions + 1):
+            try:
+                tes.run_session(session_count)
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                tes.supervise_failure(e)
+            tes.profile_session(session_count)
+    except KeyboardInterrupt:
+        print("\n=== SOAK TEST DIHENTIKAN ===")
+    finally:
+        tes.cleanup()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n⏱️  Durasi: {(time.time() - start) / 3600:.2f} jam, gagal: {tes.recovery_stats['failures']}")
+    print(f"📇 Roster: {tes.roster.get_stats()}, kartu tidak dikenal: {tes.reader.unknown_taps}")
+
+    summary = summarize(read_log(args.log_file), args.warmup)
+    if summary is None:
+        raise SystemExit("❌ Tidak ada sampel setelah warmup")
+    print_summary(summary)
+
+    limits = {'rss_kb': args.max_rss_kb, 'fds': args.max_fd, 'threads': args.max_threads}
+    leaks = [key for key, limit in limits.items() if summary['trend'].get(key, 0.0) > limit]
+    if leaks:
+        print(f"\n❌ Kemungkinan leak: {', '.join(leaks)}")
+        raise SystemExit(1)
+    print("\n✅ Tidak ada tren leak di atas batas")
+
+if __name__ == "__main__":
+    main()
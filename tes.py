@@ -11,31 +11,16 @@ import threading
 import subprocess
 import pygame
 import json
-
-# =============================
-# KONFIGURASI SISTEM
-# =============================
-CONFIG = {
-    'model_path': "runs/detect/train/weights/best.pt",
-    'confidence_threshold': 0.35,
-    'required_objects': ['NAME TAG', 'PIN CITA CITA', 'ID CARD'],
-    'detection_duration': 6,  # 6 detik proses deteksi
-    'servo_pin': 18,
-    'default_angle': 50,
-    'min_confidence': 0.5,  # Minimal confidence untuk dianggap terdeteksi
-    'audio_files': {
-        'no_card': "Tanpa Kartu aku~.mp3",
-        'all_attributes': "semua atribut lengkap.mp3", 
-        'violation': "pelanggaran.mp3",
-        'already_tapped': "sudah_tap_hari_ini.mp3"  # Audio baru untuk sudah tap
-    },
-    'video_files': {
-        'normal': "normal.mp4",
-        'happy': "senang.mp4", 
-        'ledek': "ledek.mp4",
-        'already_tapped': "sudah_tap_hari_ini.mp4"  # Video baru untuk sudah tap
-    }
-}
+import queue
+import shutil
+from collections import deque
+from config import CONFIG
+from deteksi import (SimpleDetectionManager, FrameGate, AdaptiveInferenceController,
+                     AttributeTracker, DetectionPipeline, select_model_path)
+from inference_server import RemoteInferenceModel, load_authkey
+from gate_store import GateStore
+from profiling import ResourceProfiler
+from roster import RosterCache, parse_card_fields, verify_card_signature
 
 # Inisialisasi pembaca RFID
 reader = SimpleMFRC522()
@@ -48,50 +33,39 @@ rfid_detected = False
 rfid_data = None
 video_playing = False
 system_active = True
+rfid_error_count = 0
+rfid_thread = None
+rfid_stop = threading.Event()
+last_idle_check = 0.0
 
 # Initialize pygame for audio
 pygame.mixer.init()
 
 # =============================
-# DETECTION MANAGER SEDERHANA
+# PIPELINE DETEKSI
 # =============================
 
-class SimpleDetectionManager:
-    def __init__(self):
-        self.detected_objects = set()
-        self.highest_confidence = {}
-        
-    def update_detections(self, detections):
-        """Update deteksi objek"""
-        for detection in detections:
-            class_name = detection['class_name']
-            confidence = detection['confidence']
-            
-            if confidence >= CONFIG['min_confidence']:
-                self.detected_objects.add(class_name)
-                
-                # Simpan confidence tertinggi
-                if class_name not in self.highest_confidence or confidence > self.highest_confidence[class_name]:
-                    self.highest_confidence[class_name] = confidence
-    
-    def get_results(self):
-        """Hasil akhir deteksi"""
-        return {
-            'detected_objects': list(self.detected_objects),
-            'missing_objects': [obj for obj in CONFIG['required_objects'] if obj not in self.detected_objects],
-            'confidence_scores': self.highest_confidence,
-            'success': len(self.detected_objects) == len(CONFIG['required_objects']),
-            'detected_count': len(self.detected_objects),
-            'total_required': len(CONFIG['required_objects'])
-        }
-    
-    def reset(self):
-        """Reset untuk deteksi baru"""
-        self.detected_objects = set()
-        self.highest_confidence = {}
-
 # Initialize detection manager
-detection_manager = SimpleDetectionManager()
+detection_manager = SimpleDetectionManager(CONFIG['required_objects'], CONFIG['min_confidence'])
+
+# Pre-filter frame sebelum YOLO
+frame_gate = None
+if CONFIG['motion_gate']['enabled']:
+    frame_gate = FrameGate(**{k: v for k, v in CONFIG['motion_gate'].items() if k != 'enabled'})
+
+# Controller latency - tidak di-reset antar sesi karena kondisi thermal tetap berlaku
+inference_controller = None
+if CONFIG['adaptive_inference']['enabled']:
+    inference_controller = AdaptiveInferenceController(
+        **{k: v for k, v in CONFIG['adaptive_inference'].items() if k != 'enabled'})
+
+# Tracker di antara frame YOLO
+attribute_tracker = None
+if CONFIG['tracker']['enabled']:
+    attribute_tracker = AttributeTracker(CONFIG['tracker']['type'], CONFIG['tracker']['confidence_decay'])
+
+# Pipeline dibuat setelah model di-load (lihat main)
+detection_pipeline = None
 
 # =============================
 # FUNGSI UTILITY - DITAMBAH FITUR TAP SEHARI SEKALI
@@ -99,6 +73,18 @@ detection_manager = SimpleDetectionManager()
 
 JSON_FILE = "presensi.json"
 
+# Mode multi-gerbang: log per gerbang + index replika lokal
+gate_store = None
+if CONFIG['multi_gate']['enabled']:
+    gate_store = GateStore(CONFIG['multi_gate']['log_dir'], CONFIG['multi_gate']['gate_id'])
+
+# Roster kartu: data siswa kanonik, kartu tidak terdaftar ditolak sebelum kamera/model bekerja
+roster = None
+if CONFIG['roster']['enabled']:
+    roster = RosterCache(CONFIG['roster']['path'], CONFIG['roster']['check_interval'])
+    if not roster.is_loaded():
+        print(f"⚠️ Roster {CONFIG['roster']['path']} belum ada - data dari teks kartu dipakai apa adanya")
+
 def load_presensi_data():
     """Memuat data presensi dari file JSON"""
     try:
@@ -113,6 +99,11 @@ def load_presensi_data():
 def save_presensi_data(data):
     """Menyimpan data presensi ke file JSON"""
     try:
+        if gate_store is not None:
+            entry = gate_store.append(data)
+            print(f"✅ Data presensi disimpan ke log {gate_store.gate_id} (seq {entry['seq']})")
+            return True
+        
         existing_data = load_presensi_data()
         existing_data.append(data)
         
@@ -129,6 +120,12 @@ def check_already_tapped_today(card_id):
     """Cek apakah kartu sudah di-tap hari ini"""
     try:
         today = date.today().isoformat()
+        
+        # Multi-gerbang: cek tap dari semua gerbang lewat index lokal
+        if gate_store is not None:
+            record = gate_store.find_tap(card_id, today)
+            return record is not None, record
+        
         presensi_data = load_presensi_data()
         
         for record in presensi_data:
@@ -140,6 +137,50 @@ def check_already_tapped_today(card_id):
         print(f"❌ Error checking tap history: {e}")
         return False, None
 
+def validate_card(card_id, text):
+    """Cek signature, lalu ambil data kanonik dari roster (fallback teks kartu), None jika ditolak"""
+    roster_config = CONFIG['roster']
+    try:
+        body = verify_card_signature(card_id, text, roster_config['secret'],
+                                     roster_config['require_signature'],
+                                     roster_config['signature_length'])
+    except ValueError as e:
+        print(f"❌ Payload kartu ditolak: {e}")
+        return None
+    
+    if roster is not None:
+        # Roster yang baru dibuat saat kiosk berjalan juga ikut terbaca
+        roster.refresh()
+    
+    if roster is not None and roster.is_loaded():
+        student = roster.lookup(card_id)
+        stats = roster.get_stats()
+        print(f"📇 Roster: hit {stats['hits']}, miss {stats['misses']} (hit rate {stats['hit_rate'] * 100:.1f}%)")
+        if student is None:
+            print(f"❌ Kartu {card_id} tidak terdaftar di roster")
+            return None
+        # Roster kanonik - isi kartu lama/rusak tidak membuat kartu terdaftar ditolak
+        try:
+            fields = parse_card_fields(body)
+        except ValueError as e:
+            print(f"⚠️ {e}, dipakai data roster")
+            fields = []
+        if fields and fields[0] != student['nama']:
+            print(f"⚠️ Nama di kartu '{fields[0]}' beda dengan roster, dipakai '{student['nama']}'")
+        return student
+    
+    # Tanpa roster: data dari teks kartu
+    try:
+        fields = parse_card_fields(body)
+    except ValueError as e:
+        print(f"❌ Payload kartu ditolak: {e}")
+        return None
+    if not fields:
+        print(f"❌ Data kartu tidak lengkap dan roster belum ada: {text}")
+        return None
+    nama, jurusan, angkatan = fields
+    return {'card_id': card_id, 'nama': nama, 'jurusan': jurusan, 'angkatan': angkatan}
+
 def safe_camera_read():
     """Membaca frame kamera dengan error handling"""
     global camera
@@ -152,6 +193,165 @@ def safe_camera_read():
     except Exception as e:
         return False, None
 
+# =============================
+# EVIDENCE SNAPSHOT - BACKGROUND WRITER
+# =============================
+
+class EvidenceWriter:
+    """Menulis frame & crop terbaik per class di thread terpisah, folder evidence dibatasi dan dirotasi"""
+    
+    def __init__(self, root, image_format='jpg', quality=85, max_sessions=2000, max_mb=1024, queue_size=8):
+        self.root = root
+        self.image_format = image_format
+        self.quality = quality
+        self.max_sessions = max_sessions
+        self.max_bytes = max_mb * 1024 * 1024
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        
+        # Index sesi yang sudah ada (terlama di depan) supaya rotasi tidak perlu scan ulang
+        self.sessions = deque()
+        self.total_bytes = 0
+        self._scan_existing()
+        
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def _scan_existing(self):
+        if not os.path.isdir(self.root):
+            return
+        for day in sorted(os.listdir(self.root)):
+            day_dir = os.path.join(self.root, day)
+            if not os.path.isdir(day_dir):
+                continue
+            for session in sorted(os.listdir(day_dir)):
+                session_dir = os.path.join(day_dir, session)
+                size = self._dir_size(session_dir)
+                self.sessions.append((session_dir, size))
+                self.total_bytes += size
+    
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for name in os.listdir(path):
+            try:
+                total += os.path.getsize(os.path.join(path, name))
+            except OSError:
+                pass
+        return total
+    
+    def submit(self, card_data, evidence, detection_results, scene=None):
+        """Antrikan evidence tanpa blocking, return path folder evidence (None jika di-drop)"""
+        now = datetime.now()
+        session_dir = os.path.join(self.root, now.strftime("%Y-%m-%d"),
+                                   f"{now.strftime('%H%M%S_%f')}_{card_data['card_id']}")
+        meta = {
+            'card_id': card_data['card_id'],
+            'nama': card_data['nama'],
+            'status': "BERHASIL" if detection_results['success'] else "GAGAL",
+            'confidence_scores': detection_results['confidence_scores'],
+            'boxes': {class_name: [int(v) for v in item['box']] for class_name, item in evidence.items()},
+            'missing': [name for name in CONFIG['required_objects'] if name not in evidence],
+            'scene': scene is not None,
+            'timestamp': now.isoformat()
+        }
+        
+        try:
+            self.queue.put_nowait((session_dir, evidence, scene, meta))
+            return session_dir
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Evidence queue penuh, evidence {card_data['card_id']} tidak disimpan")
+            return None
+    
+    def _encode_params(self):
+        if self.image_format == 'webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+    
+    def _write(self, session_dir, evidence, scene, meta):
+        os.makedirs(session_dir, exist_ok=True)
+        params = self._encode_params()
+        
+        # Frame paling tajam sesi - selalu ada, juga untuk sesi GAGAL tanpa deteksi
+        if scene is not None:
+            cv2.imwrite(os.path.join(session_dir, f"scene.{self.image_format}"), scene, params)
+        
+        for class_name, item in evidence.items():
+            slug = class_name.lower().replace(' ', '_')
+            frame = item['frame']
+            x1, y1, x2, y2 = item['box']
+            h, w = frame.shape[:2]
+            crop = frame[max(0, y1):min(h, y2), max(0, x1):min(w, x2)]
+            
+            cv2.imwrite(os.path.join(session_dir, f"frame_{slug}.{self.image_format}"), frame, params)
+            if crop.size > 0:
+                cv2.imwrite(os.path.join(session_dir, f"crop_{slug}.{self.image_format}"), crop, params)
+        
+        with open(os.path.join(session_dir, "meta.json"), 'w') as f:
+            json.dump(meta, f, indent=4)
+        
+        size = self._dir_size(session_dir)
+        self.sessions.append((session_dir, size))
+        self.total_bytes += size
+        self.written += 1
+    
+    def _rotate(self):
+        while self.sessions and (len(self.sessions) > self.max_sessions or self.total_bytes > self.max_bytes):
+            session_dir, size = self.sessions.popleft()
+            shutil.rmtree(session_dir, ignore_errors=True)
+            self.total_bytes -= size
+            
+            # Hapus folder tanggal yang sudah kosong
+            day_dir = os.path.dirname(session_dir)
+            try:
+                if not os.listdir(day_dir):
+                    os.rmdir(day_dir)
+            except OSError:
+                pass
+    
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+                self._rotate()
+            except Exception as e:
+                print(f"❌ Error writing evidence: {e}")
+    
+    def stop(self, timeout=2.0):
+        """Selesaikan antrian lalu hentikan thread writer"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout=timeout)
+
+evidence_writer = None
+if CONFIG['evidence']['enabled']:
+    evidence_writer = EvidenceWriter(CONFIG['evidence']['dir'],
+                                     CONFIG['evidence']['format'],
+                                     CONFIG['evidence']['quality'],
+                                     CONFIG['evidence']['max_sessions'],
+                                     CONFIG['evidence']['max_mb'],
+                                     CONFIG['evidence']['queue_size'])
+
+def submit_evidence(card_data, detection_results):
+    """Kirim evidence sesi ke background writer, return path untuk record presensi"""
+    if evidence_writer is None:
+        return None
+    if CONFIG['evidence']['only_failed'] and detection_results['success']:
+        return None
+    
+    evidence = detection_pipeline.get_evidence()
+    scene = detection_pipeline.get_scene()
+    if not evidence and scene is None:
+        return None
+    return evidence_writer.submit(card_data, evidence, detection_results, scene)
+
 # =============================
 # FUNGSI FULLSCREEN WINDOW
 # =============================
@@ -299,9 +499,7 @@ def play_video_with_rfid_waiting():
     
     cap = cv2.VideoCapture(video_path)
     
-    rfid_thread = threading.Thread(target=rfid_listener)
-    rfid_thread.daemon = True
-    rfid_thread.start()
+    start_rfid_listener()
     
     # GUNAKAN FULLSCREEN
     create_fullscreen_window("Sistem Presensi")
@@ -327,6 +525,15 @@ def play_video_with_rfid_waiting():
         
         cv2.imshow("Sistem Presensi", frame)
         
+        try:
+            check_idle_health()
+        except RuntimeError:
+            video_playing = False
+            stop_audio()
+            cap.release()
+            stop_rfid_listener()
+            raise
+        
         key = cv2.waitKey(50) & 0xFF
         if key == ord('q') or key == 27:  # 27 = ESC key
             video_playing = False
@@ -341,8 +548,7 @@ def play_video_with_rfid_waiting():
     
     cap.release()
     video_playing = False
-    if rfid_thread.is_alive():
-        rfid_thread.join(timeout=1.0)
+    stop_rfid_listener()
     
     return rfid_data
 
@@ -443,9 +649,7 @@ def show_static_waiting_screen():
     rfid_detected = False
     rfid_data = None
     
-    rfid_thread = threading.Thread(target=rfid_listener)
-    rfid_thread.daemon = True
-    rfid_thread.start()
+    start_rfid_listener()
     
     while video_playing and not rfid_detected and system_active:
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -459,6 +663,14 @@ def show_static_waiting_screen():
         
         cv2.imshow("Sistem Presensi", frame)
         
+        try:
+            check_idle_health()
+        except RuntimeError:
+            video_playing = False
+            stop_audio()
+            stop_rfid_listener()
+            raise
+        
         key = cv2.waitKey(100) & 0xFF
         if key == ord('q') or key == 27:  # 27 = ESC key
             video_playing = False
@@ -470,8 +682,7 @@ def show_static_waiting_screen():
             stop_audio()
             break
     
-    if rfid_thread.is_alive():
-        rfid_thread.join(timeout=1.0)
+    stop_rfid_listener()
     return rfid_data
 
 def show_happy_static_screen():
@@ -544,13 +755,15 @@ def show_ledek_static_screen():
 
 def rfid_listener():
     """Thread untuk mendengarkan RFID di background"""
-    global rfid_detected, rfid_data, video_playing, system_active
+    global rfid_detected, rfid_data, video_playing, system_active, rfid_error_count
     
     print("🎧 RFID listener started...")
     
-    while video_playing and not rfid_detected and system_active:
+    # read_no_block + polling: thread selalu bisa dihentikan, tidak tertahan di reader.read()
+    while video_playing and not rfid_detected and system_active and not rfid_stop.is_set():
         try:
-            id, text = reader.read()
+            id, text = reader.read_no_block()
+            rfid_error_count = 0
             if id:
                 card_id = str(id)
                 print(f"✅ RFID Card detected: {card_id}")
@@ -558,10 +771,33 @@ def rfid_listener():
                 rfid_data = (id, text)
                 video_playing = False
                 break
+            rfid_stop.wait(0.1)
         except Exception as e:
-            time.sleep(0.5)
+            rfid_error_count += 1
+            if rfid_error_count >= CONFIG['supervisor']['rfid_error_limit']:
+                # Layar tunggu melihat error count dan menyerahkan ke supervisor
+                print(f"❌ RFID reader error {rfid_error_count}x berturut-turut: {e}")
+                break
+            rfid_stop.wait(0.5)
             continue
 
+def start_rfid_listener():
+    """Mulai listener baru - listener lama dihentikan dulu supaya reader SPI tidak dibaca dua thread"""
+    global rfid_thread
+    if not stop_rfid_listener():
+        raise RuntimeError("RFID listener lama tidak berhenti")
+    rfid_stop.clear()
+    rfid_thread = threading.Thread(target=rfid_listener)
+    rfid_thread.daemon = True
+    rfid_thread.start()
+
+def stop_rfid_listener(timeout=2.0):
+    """Minta listener berhenti dan tunggu, return True jika tidak ada listener yang masih jalan"""
+    rfid_stop.set()
+    if rfid_thread is not None and rfid_thread.is_alive():
+        rfid_thread.join(timeout=timeout)
+    return rfid_thread is None or not rfid_thread.is_alive()
+
 # =============================
 # FUNGSI SERVO & CAMERA
 # =============================
@@ -655,8 +891,16 @@ def load_yolov11_model():
     """Load model YOLOv11"""
     global model
     try:
-        model = YOLO(CONFIG['model_path'])
-        print(f"✅ Model YOLO loaded: {CONFIG['model_path']}")
+        server = CONFIG['inference_server']
+        if server['enabled']:
+            # Model dipegang inference server bersama, kiosk hanya mengirim frame
+            authkey = load_authkey(server, server['host'])
+            model = RemoteInferenceModel((server['host'], server['port']), authkey, server['stream_id'])
+            print(f"✅ Connected to inference server: {server['host']}:{server['port']}")
+        else:
+            model_path = select_model_path(CONFIG)
+            model = YOLO(model_path, task='detect')
+            print(f"✅ Model YOLO loaded: {model_path}")
         
         print(f"📦 Model classes: {model.names}")
         
@@ -676,21 +920,98 @@ def load_yolov11_model():
 # FUNGSI DETECTION SEDERHANA - 6 DETIK
 # =============================
 
-def simple_6s_detection():
+def draw_detections(display_frame, detections):
+    """Menggambar bounding box hasil deteksi"""
+    colors = {'NAME TAG': (0, 255, 0), 'PIN CITA CITA': (255, 255, 0), 'ID CARD': (0, 255, 255)}
+    
+    for detection in detections:
+        class_name = detection['class_name']
+        confidence = detection['confidence']
+        x1, y1, x2, y2 = detection['box']
+        
+        color = colors.get(class_name, (255, 0, 0))
+        thickness = 1 if detection.get('source') == 'track' else 2  # Box dari tracker lebih tipis
+        cv2.rectangle(display_frame, (x1, y1), (x2, y2), color, thickness)
+        cv2.putText(display_frame, f"{class_name} {confidence:.2f}", 
+                   (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+
+class SpeculativeDetection:
+    """Capture + inferensi mulai di background saat kartu di-tap, paralel dengan validasi kartu"""
+    
+    read_retry_delay = 0.05     # Jeda setelah gagal baca kamera - jangan menghabiskan satu core
+    max_read_failures = 20      # Kamera rusak: berhenti, loop deteksi utama yang melanjutkan
+    
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started_at = None
+        self.frames = 0
+        self.read_failures = 0
+    
+    def start(self):
+        detection_pipeline.reset()
+        self.started_at = time.time()
+        
+        # Servo selalu ke sudut yang sama - jalankan paralel, frame blur saat bergerak di-skip gate
+        adjust_thread = threading.Thread(target=auto_adjust_camera)
+        adjust_thread.daemon = True
+        adjust_thread.start()
+        
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def _run(self):
+        while (not self.stop_event.is_set() and system_active and
+               time.time() - self.started_at < CONFIG['detection_duration']):
+            ret, frame = safe_camera_read()
+            if not ret:
+                self.read_failures += 1
+                if self.read_failures >= self.max_read_failures:
+                    print(f"⚠️ Speculative detection berhenti: kamera gagal dibaca {self.read_failures}x berturut-turut")
+                    break
+                self.stop_event.wait(self.read_retry_delay)
+                continue
+            self.read_failures = 0
+            try:
+                detection_pipeline.process(frame)
+                self.frames += 1
+            except Exception as e:
+                print(f"⚠️ Speculative detection error: {e}")
+    
+    def finish(self):
+        """Hentikan thread (kamera kembali ke main thread), return detik yang sudah berjalan"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        return time.time() - self.started_at
+    
+    def discard(self):
+        """Kartu ditolak - buang semua evidence yang sudah terkumpul"""
+        self.finish()
+        detection_pipeline.reset()
+        print(f"🗑️  Speculative detection dibuang ({self.frames} frame)")
+
+def simple_6s_detection(speculative=None):
     """Deteksi sederhana selama 6 detik - FULLSCREEN"""
     global detection_manager
     
     print("🔍 SIMPLE 6 SECOND DETECTION STARTED")
     print("⏱️  Proses deteksi: 6 detik")
     
-    # Reset detection manager
-    detection_manager.reset()
-    
-    # Auto-adjust camera
-    auto_adjust_camera()
-    
-    start_time = time.time()
-    frame_count = 0
+    if speculative is not None:
+        # Lanjutkan sesi yang sudah dimulai saat tap - evidence dan waktu tetap dihitung
+        elapsed = speculative.finish()
+        start_time = time.time() - elapsed
+        print(f"⚡ Melanjutkan speculative detection: {speculative.frames} frame dalam {elapsed:.1f}s")
+    else:
+        # Reset pipeline (detection manager, gate, tracker)
+        detection_pipeline.reset()
+        
+        # Auto-adjust camera
+        auto_adjust_camera()
+        
+        start_time = time.time()
     
     # GUNAKAN FULLSCREEN
     create_fullscreen_window("Deteksi Atribut - 6 Detik")
@@ -701,48 +1022,18 @@ def simple_6s_detection():
         
         ret, frame = safe_camera_read()
         if not ret:
+            time.sleep(SpeculativeDetection.read_retry_delay)
             continue
             
-        frame_count += 1
         current_time = time.time() - start_time
         remaining_time = CONFIG['detection_duration'] - current_time
         
-        # Lakukan deteksi
-        current_detections = []
         display_frame = frame.copy()
         
         try:
-            results = model(frame, 
-                          conf=CONFIG['confidence_threshold'],
-                          verbose=False,
-                          imgsz=640)
-            
-            if results and len(results) > 0:
-                boxes = results[0].boxes
-                
-                if boxes is not None:
-                    for box in boxes:
-                        confidence = box.conf.item()
-                        class_id = int(box.cls.item())
-                        class_name = model.names[class_id]
-                        
-                        if class_name in CONFIG['required_objects']:
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                            
-                            current_detections.append({
-                                'class_name': class_name,
-                                'confidence': confidence
-                            })
-                            
-                            # Draw bounding box
-                            colors = {'NAME TAG': (0, 255, 0), 'PIN CITA CITA': (255, 255, 0), 'ID CARD': (0, 255, 255)}
-                            color = colors.get(class_name, (255, 0, 0))
-                            cv2.rectangle(display_frame, (x1, y1), (x2, y2), color, 2)
-                            cv2.putText(display_frame, f"{class_name} {confidence:.2f}", 
-                                       (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-            
-            # Update detections
-            detection_manager.update_detections(current_detections)
+            # Gate, YOLO atau tracker - frame yang di-skip tetap menampilkan box terakhir
+            current_detections = detection_pipeline.process(frame)
+            draw_detections(display_frame, current_detections)
             
             # Display informasi sederhana
             cv2.putText(display_frame, f"Waktu: {current_time:.1f}s / {CONFIG['detection_duration']}s", 
@@ -785,8 +1076,16 @@ def simple_6s_detection():
     # Hasil akhir
     detection_results = detection_manager.get_results()
     
+    # Metrik sesi
+    session_metrics = detection_pipeline.get_metrics()
+    detection_results['session_metrics'] = session_metrics
+    
     print(f"\n📊 DETECTION COMPLETED")
-    print(f"📈 Frames processed: {frame_count}")
+    print(f"📈 Frames processed: {session_metrics['frames']}")
+    print(f"🧠 Frames inferred: {session_metrics['frames_inferred']} "
+          f"(avg {session_metrics['avg_inference_ms']:.0f}ms, level {session_metrics['inference_level']})")
+    print(f"🎯 Frames tracked: {session_metrics['frames_tracked']}")
+    print(f"⏭️  Frames skipped: {session_metrics['frames_skipped']} {session_metrics['skip_reasons']}")
     print(f"✅ Objek terdeteksi: {detection_results['detected_objects']}")
     print(f"❌ Objek tidak terdeteksi: {detection_results['missing_objects']}")
     print(f"🎯 Status: {'BERHASIL' if detection_results['success'] else 'GAGAL'}")
@@ -817,6 +1116,24 @@ def show_card_detected_screen(card_data):
     
     return True
 
+def show_unknown_card_screen(card_id):
+    """Kartu tidak terdaftar / payload tidak valid - FULLSCREEN"""
+    create_fullscreen_window("Sistem Presensi")
+    
+    card_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    
+    cv2.putText(card_frame, "KARTU TIDAK TERDAFTAR", (110, 150), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
+    cv2.putText(card_frame, f"ID: {card_id}", (50, 230), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    cv2.putText(card_frame, "Hubungi petugas untuk pendaftaran kartu", (50, 300), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+    
+    cv2.imshow("Sistem Presensi", card_frame)
+    cv2.waitKey(2000)
+    
+    return True
+
 def show_final_result_screen(card_data, detection_results):
     """Menampilkan hasil akhir - FULLSCREEN"""
     create_fullscreen_window("Sistem Presensi")
@@ -863,7 +1180,7 @@ def show_final_result_screen(card_data, detection_results):
     
     return True
 
-def save_attendance_data(card_data, detection_results):
+def save_attendance_data(card_data, detection_results, evidence_path=None):
     """Menyimpan data presensi"""
     try:
         attendance_data = {
@@ -880,6 +1197,9 @@ def save_attendance_data(card_data, detection_results):
             "tanggal": date.today().isoformat()
         }
         
+        if evidence_path:
+            attendance_data["evidence"] = evidence_path
+        
         if save_presensi_data(attendance_data):
             print(f"📝 Data presensi disimpan: {card_data['nama']}")
             return True
@@ -895,8 +1215,292 @@ def save_attendance_data(card_data, detection_results):
 # FUNGSI UTAMA - DITAMBAH CEK TAP SEHARI SEKALI
 # =============================
 
+def run_session(session_count):
+    """Satu sesi presensi: tunggu kartu, cek tap, deteksi, simpan"""
+    global current_card_data
+    
+    print("\n" + "="*50)
+    print(f"🔄 SESSION #{session_count}")
+    print("🎯 Target: NAME TAG, PIN CITA CITA, ID CARD")
+    print("⏱️  Proses: 6 detik deteksi")
+    print("="*50)
+    
+    # STEP 1: Menunggu RFID
+    print("\n1️⃣ MENUNGGU KARTU RFID...")
+    rfid_result = play_video_with_rfid_waiting()
+    
+    if rfid_result is None:
+        print("❌ Tidak ada data RFID")
+        return
+        
+    id, text = rfid_result
+    
+    # STEP 2: Process RFID data dan CEK SUDAH TAP HARI INI
+    print("\n2️⃣ MEMBACA DATA KARTU DAN CEK PRESENSI...")
+    
+    card_id = str(id)
+    
+    # Validasi cepat (signature + roster) sebelum kamera dan model bekerja
+    student = validate_card(card_id, text)
+    if student is None:
+        show_unknown_card_screen(card_id)
+        return
+    
+    nama, jurusan, angkatan = student['nama'], student['jurusan'], student['angkatan']
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Kamera dan model mulai bekerja selama cek tap dan layar kartu
+    speculative = None
+    if CONFIG['speculative_detection']:
+        speculative = SpeculativeDetection()
+        speculative.start()
+    
+    try:
+        # CEK APAKAH SUDAH TAP HARI INI
+        already_tapped, previous_record = check_already_tapped_today(card_id)
+        if already_tapped:
+            if speculative is not None:
+                speculative.discard()
+                speculative = None
+            
+            print(f"⚠️ Kartu sudah digunakan hari ini oleh: {nama}")
+            print(f"📅 Terakhir tap: {previous_record.get('waktu_presensi', 'Unknown')}")
+            
+            # Tampilkan pesan sudah tap
+            play_already_tapped_video()
+            return  # Langsung kembali ke mode tunggu
+        
+        current_card_data = {
+            'card_id': card_id,
+            'nama': nama,
+            'jurusan': jurusan,
+            'angkatan': angkatan,
+            'time': current_time
+        }
+        
+        print(f"📋 Kartu: {nama}, {jurusan}, {angkatan}")
+        print("✅ Kartu belum digunakan hari ini, lanjut deteksi...")
+        
+        show_card_detected_screen(current_card_data)
+        
+        # STEP 3: Deteksi 6 detik (melanjutkan speculative detection jika ada)
+        print("\n3️⃣ DETEKSI ATRIBUT (6 DETIK)...")
+        detection_results = simple_6s_detection(speculative)
+        speculative = None
+    finally:
+        # Error di tengah validasi: pastikan thread berhenti sebelum kamera dipakai lagi
+        if speculative is not None:
+            speculative.discard()
+    
+    # Tanpa satu frame pun hasilnya pasti GAGAL - jangan disimpan, serahkan ke supervisor
+    session_metrics = detection_results['session_metrics']
+    if session_metrics['frames'] == 0:
+        raise RuntimeError("Kamera tidak menghasilkan frame selama deteksi")
+    
+    # Model/inference server bermasalah: GAGAL di sini bukan karena atribut, jangan disimpan
+    # (siswa tidak terkunci oleh aturan tap sekali sehari) dan serahkan ke supervisor.
+    # Error sesekali tidak membatalkan sesi - BERHASIL tetap BERHASIL
+    inference_errors = session_metrics['inference_errors']
+    too_many_errors = inference_errors > CONFIG['supervisor']['max_inference_error_ratio'] * session_metrics['frames_inferred']
+    if session_metrics['frames_inferred'] == 0 or (too_many_errors and not detection_results['success']):
+        raise RuntimeError(f"Inferensi gagal selama deteksi ({inference_errors} error, "
+                           f"{session_metrics['frames_inferred']} frame berhasil): "
+                           f"{session_metrics['last_inference_error']}")
+    if inference_errors:
+        print(f"⚠️ {inference_errors} error inferensi selama deteksi, hasil tetap dipakai: "
+              f"{session_metrics['last_inference_error']}")
+    
+    # STEP 4: Hasil dan simpan
+    print("\n4️⃣ HASIL DAN SIMPAN DATA...")
+    
+    evidence_path = submit_evidence(current_card_data, detection_results)
+    save_attendance_data(current_card_data, detection_results, evidence_path)
+    
+    if detection_results['success']:
+        print("🎉 BERHASIL: Semua atribut lengkap!")
+        play_happy_video()
+    else:
+        print("❌ GAGAL: Atribut tidak lengkap!")
+        play_ledek_video()
+    
+    show_final_result_screen(current_card_data, detection_results)
+    print("🔄 Kembali ke mode tunggu...")
+
+# =============================
+# SUPERVISOR - HEALTH CHECK & RECOVERY TANPA COLD START
+# =============================
+
+recovery_stats = {
+    'failures': 0,
+    'recoveries': 0,
+    'total_recovery_time': 0.0,
+    'last_error': None
+}
+
+def check_camera_health():
+    """Kamera sehat jika masih terbuka dan bisa membaca frame"""
+    try:
+        if camera is None or not camera.isOpened():
+            return False
+        ret, frame = camera.read()
+        return ret and frame is not None
+    except Exception:
+        return False
+
+def check_mixer_health():
+    try:
+        return pygame.mixer.get_init() is not None
+    except Exception:
+        return False
+
+def check_model_health():
+    """Probe model sungguhan: model remote harus menjawab ping, model lokal harus bisa inferensi"""
+    if model is None:
+        return False
+    try:
+        if hasattr(model, 'ping'):
+            return model.ping()
+        # Frame kosong di level adaptive terkecil - cukup untuk membuktikan model masih bisa jalan
+        imgsz = CONFIG['adaptive_inference']['levels'][-1]['imgsz']
+        model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), conf=CONFIG['confidence_threshold'],
+              verbose=False, imgsz=imgsz)
+        return True
+    except Exception as e:
+        print(f"❌ Model probe gagal: {e}")
+        return False
+
+def check_rfid_health():
+    return reader is not None and rfid_error_count < CONFIG['supervisor']['rfid_error_limit']
+
+def check_idle_health():
+    """Dipanggil dari loop layar tunggu: RFID dicek tiap frame, kamera/model/mixer tiap
+    idle_check_interval. RuntimeError supaya supervisor memulihkan resource yang mati"""
+    global last_idle_check
+    
+    if not check_rfid_health():
+        raise RuntimeError(f"RFID reader error {rfid_error_count}x berturut-turut")
+    
+    now = time.time()
+    if now - last_idle_check < CONFIG['supervisor']['idle_check_interval']:
+        return
+    last_idle_check = now
+    
+    if not check_camera_health():
+        raise RuntimeError("Health check idle: kamera tidak bisa membaca frame")
+    if not check_model_health():
+        raise RuntimeError("Health check idle: model tidak lolos probe")
+    if not check_mixer_health():
+        raise RuntimeError("Health check idle: audio mixer tidak aktif")
+
+def recover_resources():
+    """Re-initialize hanya resource yang gagal health check, return True jika semua sehat"""
+    global camera, model, reader, detection_pipeline, video_playing, rfid_error_count
+    
+    # Bersihkan state UI/audio dari sesi yang gagal
+    video_playing = False
+    stop_audio()
+    try:
+        cv2.destroyAllWindows()
+    except Exception:
+        pass
+    
+    healthy = True
+    
+    if not check_camera_health():
+        print("🔧 Kamera tidak sehat, re-initialize...")
+        if camera is not None:
+            try:
+                camera.release()
+            except Exception:
+                pass
+        camera = initialize_camera_direct()
+        healthy = healthy and camera is not None
+    
+    if not check_model_health():
+        print("🔧 Model tidak lolos probe, load ulang...")
+        if load_yolov11_model() is not None and check_model_health():
+            detection_pipeline = DetectionPipeline(model, CONFIG, detection_manager, frame_gate,
+                                                   inference_controller, attribute_tracker)
+        else:
+            healthy = False
+    
+    if not check_mixer_health():
+        print("🔧 Audio mixer tidak aktif, init ulang...")
+        try:
+            pygame.mixer.init()
+        except Exception as e:
+            print(f"❌ Error init mixer: {e}")
+            healthy = False
+    
+    # Listener sesi yang gagal harus benar-benar berhenti sebelum reader dibuat ulang / sesi baru
+    if not stop_rfid_listener():
+        print("🔧 RFID listener lama belum berhenti, coba lagi nanti...")
+        healthy = False
+    elif not check_rfid_health():
+        print("🔧 RFID reader error berulang, buat ulang reader...")
+        try:
+            reader = SimpleMFRC522()
+            rfid_error_count = 0
+        except Exception as e:
+            print(f"❌ Error init RFID: {e}")
+            healthy = False
+    
+    return healthy
+
+def supervise_failure(error):
+    """Pulihkan sistem setelah sesi gagal, catat waktu recovery (MTTR)"""
+    failure_time = time.time()
+    recovery_stats['failures'] += 1
+    recovery_stats['last_error'] = str(error)
+    print(f"\n❌ ERROR: {error}")
+    print("🔧 Supervisor: health check dan recovery...")
+    
+    backoff = CONFIG['supervisor']['retry_delay']
+    while system_active and not recover_resources():
+        print(f"⏳ Recovery belum berhasil, coba lagi dalam {backoff:.1f} detik")
+        time.sleep(backoff)
+        backoff = min(backoff * 2, CONFIG['supervisor']['max_retry_delay'])
+    
+    recovery_time = time.time() - failure_time
+    recovery_stats['recoveries'] += 1
+    recovery_stats['total_recovery_time'] += recovery_time
+    mttr = recovery_stats['total_recovery_time'] / recovery_stats['recoveries']
+    print(f"✅ Recovery #{recovery_stats['recoveries']} selesai dalam {recovery_time * 1000:.0f}ms "
+          f"(MTTR {mttr * 1000:.0f}ms)")
+
+# =============================
+# PROFILING RESOURCE PER SESI (DIAGNOSA LEAK)
+# =============================
+
+resource_profiler = None
+if CONFIG['profiling']['enabled']:
+    resource_profiler = ResourceProfiler(CONFIG['profiling']['log_file'],
+                                         CONFIG['profiling']['max_mb'],
+                                         CONFIG['profiling']['backup_count'],
+                                         CONFIG['profiling']['tracemalloc'],
+                                         CONFIG['profiling']['tracemalloc_frames'],
+                                         CONFIG['profiling']['snapshot_every'],
+                                         CONFIG['profiling']['top_n'],
+                                         CONFIG['profiling']['trend_window'])
+    resource_profiler.start()
+
+def profile_session(session_count):
+    """Sampel RSS/fd/thread setelah satu sesi, return sampel (None jika profiling mati)"""
+    if resource_profiler is None:
+        return None
+    
+    sample = resource_profiler.sample(session_count, {
+        'failures': recovery_stats['failures'],
+        'evidence_queue': evidence_writer.queue.qsize() if evidence_writer else 0,
+        'roster': roster.get_stats() if roster else None
+    })
+    rss_mb = (sample['rss_kb'] or 0) / 1024
+    print(f"🩺 Resource: RSS {rss_mb:.1f}MB, fd {sample['fds']}, thread {sample['threads']} "
+          f"(tren RSS {sample['trend'].get('rss_kb', 0.0):+.1f}KB/sesi)")
+    return sample
+
 def main():
-    global camera, model, current_card_data, system_active
+    global camera, model, system_active, detection_pipeline
     
     print("🔄 Loading YOLO model...")
     model = load_yolov11_model()
@@ -904,6 +1508,9 @@ def main():
         print("❌ Gagal load model YOLO. Program dihentikan.")
         return
     
+    detection_pipeline = DetectionPipeline(model, CONFIG, detection_manager, frame_gate,
+                                           inference_controller, attribute_tracker)
+    
     print("\n🎥 Initializing camera...")
     camera = initialize_camera_direct()
     
@@ -916,93 +1523,30 @@ def main():
     session_count = 0
     
     try:
+        # Model, kamera, RFID dan mixer tetap hidup - yang diulang hanya sesi yang gagal
         while system_active:
             session_count += 1
-            print("\n" + "="*50)
-            print(f"🔄 SESSION #{session_count}")
-            print("🎯 Target: NAME TAG, PIN CITA CITA, ID CARD")
-            print("⏱️  Proses: 6 detik deteksi")
-            print("="*50)
-            
-            # STEP 1: Menunggu RFID
-            print("\n1️⃣ MENUNGGU KARTU RFID...")
-            rfid_result = play_video_with_rfid_waiting()
-            
-            if rfid_result is None:
-                print("❌ Tidak ada data RFID")
-                continue
-                
-            id, text = rfid_result
-            
-            # STEP 2: Process RFID data dan CEK SUDAH TAP HARI INI
-            print("\n2️⃣ MEMBACA DATA KARTU DAN CEK PRESENSI...")
-            
-            data = text.strip().split(',')
-            if len(data) == 3:
-                nama, jurusan, angkatan = data
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                card_id = str(id)
-                
-                # CEK APAKAH SUDAH TAP HARI INI
-                already_tapped, previous_record = check_already_tapped_today(card_id)
-                if already_tapped:
-                    print(f"⚠️ Kartu sudah digunakan hari ini oleh: {nama}")
-                    print(f"📅 Terakhir tap: {previous_record.get('waktu_presensi', 'Unknown')}")
-                    
-                    # Tampilkan pesan sudah tap
-                    play_already_tapped_video()
-                    continue  # Langsung kembali ke mode tunggu
-                
-                current_card_data = {
-                    'card_id': card_id,
-                    'nama': nama,
-                    'jurusan': jurusan,
-                    'angkatan': angkatan,
-                    'time': current_time
-                }
-                
-                print(f"📋 Kartu: {nama}, {jurusan}, {angkatan}")
-                print("✅ Kartu belum digunakan hari ini, lanjut deteksi...")
-                
-                show_card_detected_screen(current_card_data)
-                
-                # STEP 3: Deteksi 6 detik
-                print("\n3️⃣ DETEKSI ATRIBUT (6 DETIK)...")
-                detection_results = simple_6s_detection()
-                
-                # STEP 4: Hasil dan simpan
-                print("\n4️⃣ HASIL DAN SIMPAN DATA...")
-                
-                save_attendance_data(current_card_data, detection_results)
-                
-                if detection_results['success']:
-                    print("🎉 BERHASIL: Semua atribut lengkap!")
-                    play_happy_video()
-                else:
-                    print("❌ GAGAL: Atribut tidak lengkap!")
-                    play_ledek_video()
-                
-                show_final_result_screen(current_card_data, detection_results)
-                print("🔄 Kembali ke mode tunggu...")
-                
-            else:
-                print(f"❌ Data kartu tidak lengkap: {text}")
+            try:
+                run_session(session_count)
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                supervise_failure(e)
+            profile_session(session_count)
 
     except KeyboardInterrupt:
         print("\n=== PROGRAM DIHENTIKAN ===")
 
-    except Exception as e:
-        print(f"\n❌ ERROR: {e}")
-        print("🔄 Restarting system...")
-        time.sleep(3)
-        main()
-
 def cleanup():
     """Cleanup resources"""
     global video_playing, system_active
     system_active = False
     video_playing = False
     stop_audio()
+    if evidence_writer:
+        evidence_writer.stop()
+    if resource_profiler:
+        resource_profiler.stop()
     if camera:
         camera.release()
     cv2.destroyAllWindows()